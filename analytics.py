@@ -0,0 +1,238 @@
+"""Analytics over archives of played games.
+
+Archives are JSON Lines files with one game per line, its moves being the tiles passed to
+`ScrabbleGame.play_tiles`:
+
+    {"game_id": "g1", "moves": [[{"letter": "b", "row": 7, "col": 7}, ...], ...]}
+
+`build_store` replays the archives in parallel, once, and writes one record per move to a columnar store: a
+directory of NumPy `.npy` files, one per column and chunk of games. `MoveStore` then memory-maps the chunks and runs
+the aggregations vectorized, one chunk at a time, without replaying any game or loading whole columns in memory:
+
+    build_store(['games.jsonl'], 'store')
+    MoveStore('store').average_score_per_move()
+
+Run `python analytics.py --help` to build a store and print its report from the command line.
+"""
+import argparse
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scrabble import ScrabbleGame, rejection_reasons
+
+
+# Columns, and their dtypes, of each table of the store. `game` is the game's position across the archives, `move`
+# the move's position in its game, and `reason` is 0 for valid moves, else 1 + the index in `rejection_reasons`.
+columns_by_table = {
+    'games': {'game': np.int64, 'game_id': np.str_},
+    'moves': {'game': np.int64, 'move': np.int32, 'valid': np.bool_, 'score': np.int32, 'tiles': np.int8,
+              'reason': np.int8},
+    'words': {'game': np.int64, 'move': np.int32, 'word': np.str_},
+}
+
+
+def build_store(archive_paths: list, store_path: str, workers: int = None, games_per_chunk: int = 1000) -> int:
+    """
+    Replays every game of the archives over a pool of `workers` processes and writes their moves to a new store
+    at `store_path`, one chunk of files per `games_per_chunk` games. Returns the number of moves written.
+    """
+    os.makedirs(store_path)
+    for table, columns in columns_by_table.items():
+        for column in columns:
+            os.makedirs(os.path.join(store_path, table, column))
+
+    workers = workers or os.cpu_count()
+    moves_count = 0
+    chunk_idx = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded number of chunks in flight, so that archives are never read in memory all at once
+        pending = deque()
+        for first_game, games in _read_chunks(archive_paths, games_per_chunk):
+            pending.append(executor.submit(_replay_chunk, first_game, games))
+            if len(pending) >= 2 * workers:
+                moves_count += _write_chunk(store_path, chunk_idx, pending.popleft().result())
+                chunk_idx += 1
+
+        while pending:
+            moves_count += _write_chunk(store_path, chunk_idx, pending.popleft().result())
+            chunk_idx += 1
+
+    return moves_count
+
+
+def replay_game(moves: list) -> list:
+    """
+    Plays the moves on a new game and returns, for each move, its `Play` (see `scrabble.Play`).
+    """
+    game = ScrabbleGame()
+    return [game.play(tiles) for tiles in moves]
+
+
+class MoveStore():
+    """Vectorized queries over a store written by `build_store`.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        self._chunks = {}
+
+
+    def chunks(self, table: str, column: str) -> list:
+        """
+        Returns the chunks of a column, in game and move order, as arrays memory-mapped from the store: their values
+        are only read from disk when used.
+        """
+        key = (table, column)
+        if key not in self._chunks:
+            column_path = os.path.join(self.store_path, table, column)
+            self._chunks[key] = [
+                np.load(os.path.join(column_path, file_name), mmap_mode='r')
+                for file_name in sorted(os.listdir(column_path))]
+
+        return self._chunks[key]
+
+
+    def column(self, table: str, column: str) -> np.ndarray:
+        """
+        Returns all the values of a column, in game and move order, read in memory. Aggregations over large stores
+        should go through `chunks` instead.
+        """
+        chunks = self.chunks(table, column)
+        if not chunks:
+            return np.array([], dtype=columns_by_table[table][column])
+        return np.concatenate(chunks)
+
+
+    def moves_count(self) -> int:
+        """
+        Returns the number of moves, valid or not.
+        """
+        return sum(len(scores) for scores in self.chunks('moves', 'score'))
+
+
+    def average_score_per_move(self) -> float:
+        """
+        Returns the average score of the valid moves.
+        """
+        total_score = 0
+        valid_count = 0
+        for scores, valid in zip(self.chunks('moves', 'score'), self.chunks('moves', 'valid')):
+            total_score += int(scores[valid].sum(dtype=np.int64))
+            valid_count += int(np.count_nonzero(valid))
+
+        return total_score / valid_count if valid_count else 0.0
+
+
+    def most_common_words(self, count: int = 10) -> list:
+        """
+        Returns the `count` most often formed words by valid moves, with the number of times they were formed. Ties
+        are in alphabetical order.
+
+        Returns
+            List[Tuple(word: str, times: int)]
+        """
+        times_by_word = Counter()
+        for words in self.chunks('words', 'word'):
+            chunk_words, chunk_times = np.unique(words, return_counts=True)
+            times_by_word.update(dict(zip(chunk_words.tolist(), chunk_times.tolist())))
+
+        return sorted(times_by_word.items(), key=lambda word_times: (-word_times[1], word_times[0]))[:count]
+
+
+    def rejection_reason_counts(self) -> dict:
+        """
+        Returns the number of rejected moves by rejection reason.
+        """
+        counts = np.zeros(len(rejection_reasons) + 1, dtype=np.int64)
+        for reasons in self.chunks('moves', 'reason'):
+            counts += np.bincount(reasons, minlength=len(rejection_reasons) + 1)
+
+        return {reason: int(counts[idx + 1]) for idx, reason in enumerate(rejection_reasons)}
+
+
+def _read_chunks(archive_paths: list, games_per_chunk: int):
+    """
+    Yields the games of the archives by chunks of `games_per_chunk`, along with the position of the chunk's first
+    game across the archives.
+
+    Yields
+        Tuple(first_game: int, games: List[dict])
+    """
+    first_game = 0
+    games = []
+    for archive_path in archive_paths:
+        with open(archive_path) as archive:
+            for line in archive:
+                if not line.strip():
+                    continue
+                games.append(json.loads(line))
+                if len(games) == games_per_chunk:
+                    yield first_game, games
+                    first_game += len(games)
+                    games = []
+
+    if games:
+        yield first_game, games
+
+
+def _replay_chunk(first_game: int, games: list) -> dict:
+    """
+    Replays a chunk of games and returns its records, as arrays by column by table.
+    """
+    records = {table: {column: [] for column in columns} for table, columns in columns_by_table.items()}
+
+    for game_idx, game in enumerate(games, start=first_game):
+        records['games']['game'].append(game_idx)
+        records['games']['game_id'].append(str(game['game_id']))
+
+        for move_idx, play in enumerate(replay_game(game['moves'])):
+            moves = records['moves']
+            moves['game'].append(game_idx)
+            moves['move'].append(move_idx)
+            moves['valid'].append(play.valid)
+            moves['score'].append(play.score)
+            moves['tiles'].append(len(play.tiles))
+            moves['reason'].append(0 if play.valid else rejection_reasons.index(play.rejection_reason) + 1)
+
+            for word in play.words:
+                records['words']['game'].append(game_idx)
+                records['words']['move'].append(move_idx)
+                records['words']['word'].append(word)
+
+    return {
+        table: {column: np.array(values, dtype=columns_by_table[table][column]) for column, values in columns.items()}
+        for table, columns in records.items()}
+
+
+def _write_chunk(store_path: str, chunk_idx: int, chunk: dict) -> int:
+    """
+    Writes a chunk's arrays to the store and returns its number of moves.
+    """
+    for table, columns in chunk.items():
+        for column, values in columns.items():
+            np.save(os.path.join(store_path, table, column, f"{chunk_idx:06d}.npy"), values)
+
+    return len(chunk['moves']['score'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay game archives into a columnar store and report on it.')
+    parser.add_argument('store', help='directory of the store')
+    parser.add_argument('archives', nargs='*', help='JSON Lines archives to replay into a new store')
+    parser.add_argument('--workers', type=int, default=None, help='number of replaying processes')
+    parser.add_argument('--games-per-chunk', type=int, default=1000, help='number of games per chunk of files')
+    args = parser.parse_args()
+
+    if args.archives:
+        build_store(args.archives, args.store, args.workers, args.games_per_chunk)
+
+    store = MoveStore(args.store)
+    print(f"Moves: {store.moves_count()}")
+    print(f"Average score per move: {store.average_score_per_move():.2f}")
+    print(f"Most common words: {store.most_common_words()}")
+    print(f"Rejection reasons: {store.rejection_reason_counts()}")
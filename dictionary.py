@@ -1,8 +1,114 @@
+import os
+from bisect import bisect_left
+from functools import lru_cache
+
 from pygtrie import StringTrie  # type: ignore
 
+words_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.txt")
+
 dictionary = StringTrie()
 
-with open("words.txt") as words:
+with open(words_path) as words:
     for word in words.read().splitlines():
         if word:
             dictionary[word] = word
+
+# The same words, sorted, for prefix queries: the trie is keyed by whole words.
+sorted_words = sorted(set(dictionary.values()))
+
+# The same words as a set, for membership tests: faster than looking them up in the trie.
+word_set = frozenset(sorted_words)
+
+
+class Cursor():
+    """Position in the dictionary after reading a prefix, one letter at a time.
+
+    The words starting with the prefix are the slice `sorted_words[start:end]`, so stepping to a longer prefix only
+    searches within the current slice instead of starting over from the whole dictionary:
+
+        node = root.step('c').step('a')
+        node.has_prefix, node.is_word, node.children
+    """
+
+    __slots__ = ('prefix', 'start', 'end')
+
+    def __init__(self, prefix: str, start: int, end: int):
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+
+
+    def step(self, letter: str) -> 'Cursor':
+        """
+        Returns the cursor for the prefix followed by `letter`.
+        """
+        prefix = self.prefix + letter
+        start = bisect_left(sorted_words, prefix, self.start, self.end)
+        if start == self.end or not sorted_words[start].startswith(prefix):
+            return Cursor(prefix, start, start)
+
+        end = bisect_left(sorted_words, _next_prefix(prefix), start + 1, self.end)
+        return Cursor(prefix, start, end)
+
+
+    @property
+    def has_prefix(self) -> bool:
+        """
+        Returns True if any word in the dictionary starts with the prefix; else returns False.
+        """
+        return self.start < self.end
+
+
+    @property
+    def is_word(self) -> bool:
+        """
+        Returns True if the prefix is itself a word; else returns False.
+        """
+        return self.start < self.end and sorted_words[self.start] == self.prefix
+
+
+    @property
+    def children(self) -> str:
+        """
+        Returns the letters, in alphabetical order, that can follow the prefix in a word.
+        """
+        letters = []
+        idx = self.start + 1 if self.is_word else self.start
+        while idx < self.end:
+            letter = sorted_words[idx][len(self.prefix)]
+            letters.append(letter)
+            idx = bisect_left(sorted_words, _next_prefix(self.prefix + letter), idx, self.end)
+
+        return ''.join(letters)
+
+
+    def __repr__(self) -> str:
+        return f"Cursor({self.prefix!r})"
+
+
+def _next_prefix(prefix: str) -> str:
+    """
+    Returns the smallest string greater than every string starting with `prefix`.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+root = Cursor('', 0, len(sorted_words))
+
+
+@lru_cache(maxsize=4096)
+def cursor(prefix: str) -> Cursor:
+    """
+    Returns the cursor for `prefix`. Cursors for recently seen prefixes are kept, so extending one of them by a
+    letter costs a single step.
+    """
+    if not prefix:
+        return root
+    return cursor(prefix[:-1]).step(prefix[-1])
+
+
+def has_prefix(prefix: str) -> bool:
+    """
+    Returns True if any word in the dictionary starts with `prefix`; else returns False.
+    """
+    return cursor(prefix).has_prefix
@@ -0,0 +1,499 @@
+"""Differential fuzzing of the game's validator and scorer.
+
+Random sequences of moves, legal and illegal, are played on a deliberately naive reference implementation of the
+rules (`ReferenceGame`, which scans the board square by square) and on each of the optimized paths (`paths`). Any
+difference in validity, score or words formed is shrunk to a minimal sequence of moves that still reproduces it.
+Everything runs offline against the bundled `words.txt`.
+
+    report = fuzz(sequences_count=200, seed=0)
+    if report.discrepancy:
+        print(format_reproducer(report.discrepancy))
+
+Run `python fuzz.py --help` to fuzz from the command line.
+"""
+import argparse
+import random
+import time
+from typing import NamedTuple, Optional
+
+from dictionary import dictionary
+from scrabble import ScrabbleGame, scores_by_letter
+from search import legal_moves, tile_counts
+
+
+class ReferenceGame():
+    """The rules of `ScrabbleGame`, implemented as plainly as possible on a list-of-lists board.
+    """
+
+    def __init__(self):
+        self.board = [['' for _ in range(15)] for _ in range(15)]
+
+
+    def play(self, tiles: list) -> dict:
+        """
+        Validates, scores and, if valid, places the tiles.
+
+        Returns
+            dict: Dict{'valid': bool, 'score': int, 'words': List[str]}
+                The words formed are sorted; `score` is 0 and `words` is empty if the play is not valid.
+        """
+        invalid_play = {'valid': False, 'score': 0, 'words': []}
+        for tile in tiles:
+            if not isinstance(tile, dict) or type(tile.get('row')) is not int or type(tile.get('col')) is not int:
+                return invalid_play
+            if not isinstance(tile.get('letter'), str) or tile['letter'] not in scores_by_letter:
+                return invalid_play
+
+        positions = [(tile['row'], tile['col']) for tile in tiles]
+
+        if not tiles or len(set(positions)) != len(positions):
+            return invalid_play
+        if any(not (0 <= row <= 14 and 0 <= col <= 14) for row, col in positions):
+            return invalid_play
+        if any(self.board[row][col] != '' for row, col in positions):
+            return invalid_play
+
+        rows = sorted(set(row for row, _ in positions))
+        cols = sorted(set(col for _, col in positions))
+        if len(rows) != 1 and len(cols) != 1:
+            return invalid_play
+
+        tiles = sorted(tiles, key=lambda tile: (tile['row'], tile['col']))
+        new_board = [list(row) for row in self.board]
+        for tile in tiles:
+            new_board[tile['row']][tile['col']] = tile['letter']
+
+        # no empty square between the first and the last tile
+        if len(rows) == 1:
+            line_squares = [(rows[0], col) for col in range(cols[0], cols[-1] + 1)]
+        else:
+            line_squares = [(row, cols[0]) for row in range(rows[0], rows[-1] + 1)]
+        if any(new_board[row][col] == '' for row, col in line_squares):
+            return invalid_play
+
+        tiles_word = ''.join(tile['letter'] for tile in tiles)
+        is_first_play = all(letter == '' for row in self.board for letter in row)
+
+        if is_first_play:
+            if (7, 7) not in positions or tiles_word not in dictionary:
+                return invalid_play
+            words = [tiles_word]
+
+        else:
+            if not any(self._board_neighbors(row, col) for row, col in positions):
+                return invalid_play
+
+            # the tiles alone, when next to each other, must form a word
+            are_tiles_contiguous = len(line_squares) == len(tiles)
+            if are_tiles_contiguous and tiles_word not in dictionary:
+                return invalid_play
+
+            words = []
+            if are_tiles_contiguous and self._are_tiles_self_contained(tiles, rows, cols):
+                words.append(tiles_word)
+
+            # the words through the tiles that include tiles already on the board
+            word_starts = set()
+            for row, col in positions:
+                for direction in ((0, 1), (1, 0)):
+                    start, word, includes_board_tiles = self._word_through(new_board, row, col, direction)
+                    if includes_board_tiles and (start, direction) not in word_starts:
+                        word_starts.add((start, direction))
+                        words.append(word)
+
+            if any(word not in dictionary for word in words):
+                return invalid_play
+
+        for tile in tiles:
+            self.board[tile['row']][tile['col']] = tile['letter']
+
+        score = sum(scores_by_letter[letter] for word in words for letter in word)
+        return {'valid': True, 'score': score, 'words': sorted(words)}
+
+
+    def _board_neighbors(self, row: int, col: int) -> list:
+        """
+        Returns the positions next to (row, col) that hold a tile on the board.
+        """
+        return [
+            (neighbor_row, neighbor_col)
+            for neighbor_row, neighbor_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+            if 0 <= neighbor_row <= 14 and 0 <= neighbor_col <= 14 and self.board[neighbor_row][neighbor_col] != '']
+
+
+    def _are_tiles_self_contained(self, tiles: list, rows: list, cols: list) -> bool:
+        """
+        Returns True if no tile of the board continues the tiles' line, before or after them, or, for a single
+        tile, touches it at all.
+        """
+        if len(tiles) == 1:
+            return not self._board_neighbors(tiles[0]['row'], tiles[0]['col'])
+
+        if len(rows) == 1:
+            before, after = (rows[0], cols[0] - 1), (rows[0], cols[-1] + 1)
+        else:
+            before, after = (rows[0] - 1, cols[0]), (rows[-1] + 1, cols[0])
+
+        return all(
+            not (0 <= row <= 14 and 0 <= col <= 14) or self.board[row][col] == ''
+            for row, col in (before, after))
+
+
+    def _word_through(self, board: list, row: int, col: int, direction: tuple) -> tuple:
+        """
+        Returns the word through (row, col) along `direction` on `board`.
+
+        Returns
+            Tuple(start: Tuple(int, int), word: str, includes_board_tiles: bool)
+        """
+        row_step, col_step = direction
+        while row - row_step >= 0 and col - col_step >= 0 and board[row - row_step][col - col_step] != '':
+            row, col = row - row_step, col - col_step
+
+        start = (row, col)
+        word = ''
+        includes_board_tiles = False
+        while row <= 14 and col <= 14 and board[row][col] != '':
+            word += board[row][col]
+            includes_board_tiles = includes_board_tiles or self.board[row][col] != ''
+            row, col = row + row_step, col + col_step
+
+        return start, word, includes_board_tiles
+
+
+def _run_play_tiles(moves: list):
+    game = ScrabbleGame()
+    for tiles in moves:
+        yield game.play_tiles(tiles)
+
+
+def _run_play(moves: list):
+    game = ScrabbleGame()
+    for tiles in moves:
+        play = game.play(tiles)
+        yield {'valid': play.valid, 'score': play.score, 'words': sorted(play.words)}
+
+
+def _run_evaluate_tiles(moves: list):
+    game = ScrabbleGame()
+    for tiles in moves:
+        result = game.evaluate_tiles(tiles)
+        if game.play_tiles(tiles) != result:
+            result = {'valid': None, 'score': None, 'evaluation': result}
+        yield result
+
+
+def _run_legal_moves(moves: list):
+    """
+    Plays the moves and, for each, checks that the move generator, given the move's letters as a rack, offers the
+    move with the same score whenever it is valid.
+    """
+    game = ScrabbleGame()
+    for tiles in moves:
+        snapshot = game.snapshot
+        result = game.play_tiles(tiles)
+        if result['valid']:
+            rack = ''.join(tile['letter'] for tile in tiles)
+            played = sorted((tile['letter'], tile['row'], tile['col']) for tile in tiles)
+            scores = [
+                candidate.score for candidate in legal_moves(snapshot, rack)
+                if sorted((tile['letter'], tile['row'], tile['col']) for tile in candidate.tiles) == played]
+            if scores != [result['score']]:
+                result = {'valid': True, 'score': scores}
+        yield result
+
+
+# Optimized paths checked against `ReferenceGame`: each plays a sequence of moves on a new game and yields a result
+# per move. Only the keys a path returns are compared. A path raising an exception disagrees with the reference at
+# the move it raised on (see `run_path`).
+paths = {
+    'play_tiles': _run_play_tiles,
+    'play': _run_play,
+    'evaluate_tiles': _run_evaluate_tiles,
+    'legal_moves': _run_legal_moves,
+}
+
+
+class Discrepancy(NamedTuple):
+    """
+    A sequence of `moves` on which `path` disagrees with the reference at move `move_idx`.
+    """
+    path: str
+    moves: list
+    move_idx: int
+    expected: dict
+    actual: dict
+
+
+class FuzzReport(NamedTuple):
+    """
+    Outcome of `fuzz`: the number of sequences and moves checked, how long it took, and the first (shrunk)
+    discrepancy found, if any.
+    """
+    sequences_count: int
+    moves_count: int
+    seconds: float
+    discrepancy: Optional[Discrepancy]
+
+
+def run_reference(moves: list) -> list:
+    """
+    Plays the moves on a new `ReferenceGame` and returns its result for each move (see `run_path`).
+    """
+    game = ReferenceGame()
+    return run_path(lambda moves: (game.play(tiles) for tiles in moves), moves)
+
+
+def run_path(run, moves: list) -> list:
+    """
+    Returns the results of a path on the moves. If the path raises an exception, its result for the move it raised
+    on is `{'error': repr(exception)}` and there are no results for the following moves.
+    """
+    results = []
+    try:
+        for result in run(moves):
+            results.append(result)
+    except Exception as exc:
+        results.append({'error': repr(exc)})
+
+    return results
+
+
+def find_discrepancy(moves: list, paths_to_check: dict = None) -> Optional[Discrepancy]:
+    """
+    Returns the first discrepancy between the reference and the paths on the sequence of moves, or None. An
+    exception raised by either side is a discrepancy, unless both raise the same one.
+    """
+    expected_results = run_reference(moves)
+    for path, run in (paths_to_check or paths).items():
+        for move_idx, (expected, actual) in enumerate(zip(expected_results, run_path(run, moves))):
+            if any(expected[key] != value for key, value in actual.items() if key in expected) \
+                    or not set(actual) <= set(expected):
+                return Discrepancy(path, moves, move_idx, expected, actual)
+
+    return None
+
+
+def shrink(discrepancy: Discrepancy, paths_to_check: dict = None) -> Discrepancy:
+    """
+    Returns a discrepancy of the same path from which no move, and no tile of a move, can be removed without the
+    discrepancy disappearing.
+    """
+    path_to_check = {discrepancy.path: (paths_to_check or paths)[discrepancy.path]}
+
+    def reproduces(moves):
+        return moves and find_discrepancy(moves, path_to_check) is not None
+
+    moves = discrepancy.moves[:discrepancy.move_idx + 1]
+    while True:
+        shrunk_moves = _drop_tiles(_drop_moves(moves, reproduces), reproduces)
+        if shrunk_moves == moves:
+            break
+        moves = shrunk_moves
+
+    return find_discrepancy(moves, path_to_check)
+
+
+def _drop_moves(moves: list, reproduces) -> list:
+    """
+    Drops chunks of moves while the discrepancy reproduces, halving the chunks' size when none can be dropped.
+    """
+    chunk_size = max(len(moves) // 2, 1)
+    while True:
+        idx = 0
+        while idx < len(moves):
+            candidate = moves[:idx] + moves[idx + chunk_size:]
+            if reproduces(candidate):
+                moves = candidate
+            else:
+                idx += chunk_size
+        if chunk_size == 1:
+            return moves
+        chunk_size //= 2
+
+
+def _drop_tiles(moves: list, reproduces) -> list:
+    """
+    Drops single tiles from the moves while the discrepancy reproduces.
+    """
+    for move_idx in range(len(moves)):
+        tile_idx = 0
+        while tile_idx < len(moves[move_idx]):
+            tiles = moves[move_idx][:tile_idx] + moves[move_idx][tile_idx + 1:]
+            candidate = moves[:move_idx] + [tiles] + moves[move_idx + 1:]
+            if reproduces(candidate):
+                moves = candidate
+            else:
+                tile_idx += 1
+
+    return moves
+
+
+def format_reproducer(discrepancy: Discrepancy) -> str:
+    """
+    Returns Python code replaying the discrepancy's moves on a new game.
+    """
+    lines = [
+        f"# {discrepancy.path} disagrees with the reference at move {discrepancy.move_idx}:",
+        f"#   expected {discrepancy.expected}",
+        f"#   actual   {discrepancy.actual}",
+        "from scrabble import ScrabbleGame",
+        "game = ScrabbleGame()",
+    ]
+    for tiles in discrepancy.moves:
+        lines.append(f"print(game.play_tiles({tiles!r}))")
+
+    return '\n'.join(lines)
+
+
+def random_moves(rng: random.Random, moves_count: int) -> list:
+    """
+    Returns a random sequence of moves: legal plays found by the move generator, mutations of them, and tiles
+    thrown at random around the board's tiles, a few of them malformed (see `_malform`). The sequence ends early
+    with a move the game raises an exception on, for the paths to be checked on it.
+    """
+    game = ScrabbleGame()
+    bag = ''.join(letter * count for letter, count in tile_counts.items())
+    moves = []
+    candidates = None
+
+    for _ in range(moves_count):
+        kind = rng.random()
+        tiles = None
+
+        if kind < 0.6:
+            if candidates is None:
+                rack = ''.join(rng.choice(bag) for _ in range(rng.randint(2, 5)))
+                try:
+                    candidates = legal_moves(game.snapshot, rack)
+                except Exception:
+                    candidates = []
+            if candidates:
+                tiles = [dict(tile) for tile in rng.choice(candidates).tiles]
+                if kind >= 0.35:
+                    tiles = _mutate(rng, tiles, bag)
+
+        if tiles is None:
+            tiles = _random_tiles(rng, game, bag)
+        if tiles and rng.random() < 0.05:
+            tiles = _malform(rng, tiles)
+
+        moves.append(tiles)
+        try:
+            if game.play_tiles(tiles)['valid']:
+                candidates = None
+        except Exception:
+            break
+
+    return moves
+
+
+def _mutate(rng: random.Random, tiles: list, bag: str) -> list:
+    """
+    Returns the tiles with one random change: shifted, relettered, one dropped, one added or one duplicated.
+    """
+    mutation = rng.randrange(6)
+    tile_idx = rng.randrange(len(tiles))
+
+    if mutation == 0:
+        row_shift, col_shift = rng.choice(((-1, 0), (1, 0), (0, -1), (0, 1)))
+        return [{'letter': tile['letter'], 'row': tile['row'] + row_shift, 'col': tile['col'] + col_shift}
+                for tile in tiles]
+    if mutation == 1:
+        tiles[tile_idx]['letter'] = rng.choice(bag)
+        return tiles
+    if mutation == 2 and len(tiles) > 1:
+        return tiles[:tile_idx] + tiles[tile_idx + 1:]
+    if mutation == 3:
+        tile = tiles[tile_idx]
+        row_shift, col_shift = rng.choice(((-1, 0), (1, 0), (0, -1), (0, 1), (1, 1), (0, 2), (2, 0)))
+        return tiles + [{'letter': rng.choice(bag), 'row': tile['row'] + row_shift, 'col': tile['col'] + col_shift}]
+    if mutation == 4:
+        return tiles + [dict(tiles[tile_idx])]
+    return list(reversed(tiles))
+
+
+# letters and positions a tile should never hold
+malformed_letters = ('', 'S', '?', 'ab', ' ', None, 7)
+malformed_positions = ('7', 7.0, None, -1.5)
+
+
+def _malform(rng: random.Random, tiles: list) -> list:
+    """
+    Returns the tiles with one tile made malformed: a letter without a score, a position that is not an integer, or
+    a missing key.
+    """
+    tiles = [dict(tile) for tile in tiles]
+    tile = rng.choice(tiles)
+    malformation = rng.randrange(3)
+
+    if malformation == 0:
+        tile['letter'] = rng.choice(malformed_letters)
+    elif malformation == 1:
+        tile[rng.choice(('row', 'col'))] = rng.choice(malformed_positions)
+    else:
+        del tile[rng.choice(('letter', 'row', 'col'))]
+    return tiles
+
+
+def _random_tiles(rng: random.Random, game: ScrabbleGame, bag: str) -> list:
+    """
+    Returns 1 to 4 tiles in a line starting next to a tile of the board (or the center), or, rarely, anywhere.
+    """
+    board = game.board
+    occupied = [(row, col) for row in range(15) for col in range(15) if board[row][col] != ''] or [(7, 7)]
+    row, col = rng.choice(occupied)
+    row += rng.randint(-2, 2)
+    col += rng.randint(-2, 2)
+    if rng.random() < 0.05:
+        row, col = rng.randint(-1, 15), rng.randint(-1, 15)
+
+    row_step, col_step = rng.choice(((0, 1), (1, 0)))
+    positions = [(row + idx * row_step, col + idx * col_step) for idx in range(rng.randint(1, 4))]
+    if rng.random() < 0.1:
+        del positions[rng.randrange(len(positions))]
+
+    return [{'letter': rng.choice(bag), 'row': tile_row, 'col': tile_col} for tile_row, tile_col in positions]
+
+
+def fuzz(sequences_count: int = 100, moves_count: int = 20, seed: int = 0, paths_to_check: dict = None,
+         time_limit: float = None) -> FuzzReport:
+    """
+    Checks `sequences_count` random sequences of `moves_count` moves, or as many as fit in `time_limit` seconds,
+    and stops at the first discrepancy, which is shrunk. Runs with the same arguments check the same sequences.
+    """
+    start = time.time()
+    checked_sequences = 0
+    checked_moves = 0
+    discrepancy = None
+
+    for sequence_idx in range(sequences_count):
+        if time_limit is not None and time.time() - start > time_limit:
+            break
+
+        moves = random_moves(random.Random(f"{seed}-{sequence_idx}"), moves_count)
+        checked_sequences += 1
+        checked_moves += len(moves)
+
+        discrepancy = find_discrepancy(moves, paths_to_check)
+        if discrepancy:
+            discrepancy = shrink(discrepancy, paths_to_check)
+            break
+
+    return FuzzReport(checked_sequences, checked_moves, time.time() - start, discrepancy)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fuzz the optimized paths against the reference rules.')
+    parser.add_argument('--sequences', type=int, default=100, help='number of random sequences of moves')
+    parser.add_argument('--moves', type=int, default=20, help='number of moves per sequence')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random sequences')
+    parser.add_argument('--time-limit', type=float, default=None, help='stop after this many seconds')
+    args = parser.parse_args()
+
+    report = fuzz(args.sequences, args.moves, args.seed, time_limit=args.time_limit)
+    print(f"Checked {report.moves_count} moves in {report.sequences_count} sequences in {report.seconds:.1f}s "
+          f"({report.moves_count / report.seconds:.0f} moves/s)")
+    if report.discrepancy:
+        print(format_reproducer(report.discrepancy))
+        raise SystemExit(1)
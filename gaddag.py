@@ -0,0 +1,365 @@
+"""Minimized GADDAG of the dictionary, cached on disk and memory-mapped.
+
+The dictionary's trie only reads words forwards, from their first letter. A GADDAG reads them from any of their
+letters: each word `w` is stored once per split, as the reversed prefix `w[:i]`, the `delimiter`, then the suffix
+`w[i:]`. Starting from letters already on the board, it walks left first, then, after the delimiter, right:
+
+    gaddag = load()
+    gaddag.is_word('cat')
+    list(gaddag.extend('at', rack='crs'))  # [('c', ''), ('r', ''), ('s', ''), ('c', 's'), ...]
+
+`build` minimizes the GADDAG while building it, merging the states reached by the same suffixes, and encodes it
+as an array of 32-bit edges. `load` builds it once per words file, caches it on disk and memory-maps it: queries read
+the edges from the mapping instead of loading the GADDAG into Python objects.
+
+An edge holds its letter's code in bits 0-4, whether a word ends after it in bit 5, whether it is the last edge of
+its state in bit 6, and, in the remaining bits, the index of the first edge of the state it leads to (0 if that
+state has no edges). The edges of a state are contiguous and ordered by letter.
+
+Run `python gaddag.py --help` to build the cache and query it from the command line.
+"""
+import argparse
+import hashlib
+import mmap
+import os
+from array import array
+
+
+words_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.txt")
+
+delimiter = '+'
+
+magic = 0x47414444
+version = 1
+
+# magic, version, root, edges count, then the words file's SHA-1 and the alphabet (UTF-8, padded with zeros to
+# `alphabet_size` bytes), both as 32-bit values
+alphabet_size = 32
+header_size = 4 + 5 + alphabet_size // 4
+
+letter_bits = 5
+word_end_flag = 1 << 5
+last_edge_flag = 1 << 6
+target_shift = 7
+
+
+class Gaddag():
+    """Queries over an array of edges encoded by `build`.
+    """
+
+    def __init__(self, edges, root: int, alphabet: str):
+        self.edges = edges
+        self.root = root
+        self.alphabet = alphabet
+        self.codes_by_letter = {letter: code for code, letter in enumerate(alphabet)}
+        self._mapping = None
+
+
+    def is_word(self, word: str) -> bool:
+        """
+        Returns True if the word is in the dictionary; else returns False.
+        """
+        edge = self._walk(self.root, word[::-1])
+        return edge is not None and bool(edge & word_end_flag)
+
+
+    def extend(self, fragment: str, rack: str = None, max_left: int = None, max_right: int = None):
+        """
+        Yields every split `(left, right)` such that `left + fragment + right` is a word, `left` and `right` being at
+        most `max_left` and `max_right` letters long. If `rack` is given, `left` and `right` only use its letters,
+        each at most as many times as it holds it. The fragment must not be empty.
+
+        Yields
+            Tuple(left: str, right: str)
+        """
+        if not fragment:
+            raise ValueError('the fragment must not be empty')
+
+        edge = self._walk(self.root, fragment[::-1])
+        if edge is None:
+            return
+
+        counts = None
+        if rack is not None:
+            counts = {}
+            for letter in rack:
+                counts[letter] = counts.get(letter, 0) + 1
+
+        max_left = float('inf') if max_left is None else max_left
+        max_right = float('inf') if max_right is None else max_right
+        yield from self._extend_left(edge, '', counts, max_left, max_right)
+
+
+    def _extend_left(self, edge: int, left: str, counts: dict, max_left: int, max_right: int):
+        """
+        Yields the splits reached from `edge`, prepending letters to `left` until the delimiter.
+        """
+        if edge & word_end_flag:
+            yield left, ''
+
+        for child in self._children(edge >> target_shift):
+            letter = self.alphabet[child & (word_end_flag - 1)]
+            if letter == delimiter:
+                yield from self._extend_right(child, left, '', counts, max_right)
+            elif len(left) < max_left and self._take(counts, letter):
+                yield from self._extend_left(child, letter + left, counts, max_left, max_right)
+                self._give_back(counts, letter)
+
+
+    def _extend_right(self, edge: int, left: str, right: str, counts: dict, max_right: int):
+        """
+        Yields the splits reached from `edge`, appending letters to `right`.
+        """
+        if len(right) == max_right:
+            return
+
+        for child in self._children(edge >> target_shift):
+            letter = self.alphabet[child & (word_end_flag - 1)]
+            if self._take(counts, letter):
+                if child & word_end_flag:
+                    yield left, right + letter
+                yield from self._extend_right(child, left, right + letter, counts, max_right)
+                self._give_back(counts, letter)
+
+
+    def _walk(self, state: int, letters: str):
+        """
+        Returns the last edge of the path spelling `letters` from `state`, or None if there is no such path. Returns
+        a virtual edge leading to `state` if `letters` is empty.
+        """
+        edge = state << target_shift
+        for letter in letters:
+            code = self.codes_by_letter.get(letter)
+            if code is None:
+                return None
+            for child in self._children(edge >> target_shift):
+                if child & (word_end_flag - 1) == code:
+                    edge = child
+                    break
+            else:
+                return None
+
+        return edge
+
+
+    def _children(self, state: int):
+        """
+        Yields the edges of a state.
+        """
+        if not state:
+            return
+        edges = self.edges
+        while True:
+            edge = edges[state]
+            yield edge
+            if edge & last_edge_flag:
+                return
+            state += 1
+
+
+    def _take(self, counts: dict, letter: str) -> bool:
+        """
+        Returns True, taking the letter from the rack's counts, if the rack holds it or there is no rack; else
+        returns False.
+        """
+        if counts is None:
+            return True
+        if not counts.get(letter):
+            return False
+        counts[letter] -= 1
+        return True
+
+
+    def _give_back(self, counts: dict, letter: str) -> None:
+        """
+        Puts a letter taken by `_take` back into the rack's counts.
+        """
+        if counts is not None:
+            counts[letter] += 1
+
+
+    def close(self) -> None:
+        """
+        Unmaps the cache file, if the edges were mapped from one.
+        """
+        if self._mapping is not None:
+            self.edges.release()
+            self._mapping.close()
+            self._mapping = None
+
+
+def build(words: list) -> tuple:
+    """
+    Returns the minimized GADDAG of the words, as its array of edges, the index of its root state and its alphabet.
+
+    GADDAG strings are added in sorted order, one bucket of strings with the same first letter at a time. Only the
+    states along the last added string can still change: the others are frozen, then either merged with an
+    identical, already encoded state or appended to the array. A state's identity being its encoded edges, states are
+    encoded after their children, so the root comes last.
+
+    Returns
+        Tuple(edges: array, root: int, alphabet: str)
+    """
+    words = sorted(set(word for word in words if word))
+    alphabet = ''.join(sorted(set(''.join(words)) | {delimiter}))
+    if len(alphabet) > 1 << letter_bits:
+        raise ValueError(f"too many letters in the words: {len(alphabet)}")
+    if len(alphabet.encode()) > alphabet_size:
+        raise ValueError(f"the letters of the words take more than {alphabet_size} bytes: {alphabet!r}")
+    if any(delimiter in word for word in words):
+        raise ValueError(f"the words must not contain the delimiter: {delimiter!r}")
+    codes_by_letter = {letter: code for code, letter in enumerate(alphabet)}
+
+    # edge 0 is never read, so that 0 can stand for the target of states without edges
+    edges = array('I', [0])
+    states_by_edges = {}
+
+    def encode(state_edges: list) -> int:
+        if not state_edges:
+            return 0
+        state_edges[-1] |= last_edge_flag
+        key = state_edges[0] if len(state_edges) == 1 else tuple(state_edges)
+        state = states_by_edges.get(key)
+        if state is None:
+            state = len(edges)
+            if state >= 1 << (32 - target_shift):
+                raise ValueError("too many edges to encode")
+            states_by_edges[key] = state
+            edges.extend(state_edges)
+        return state
+
+    # the unfrozen states along the last added string: their encoded edges so far, and whether a word ends there
+    path_edges = [[]]
+    path_ends = [False]
+    previous = ''
+
+    def freeze(depth: int) -> None:
+        while len(path_edges) > depth + 1:
+            state = encode(path_edges.pop())
+            word_end = word_end_flag if path_ends.pop() else 0
+            letter = previous[len(path_edges) - 1]
+            path_edges[-1].append(state << target_shift | word_end | codes_by_letter[letter])
+
+    for first_letter in alphabet:
+        for string in _gaddag_strings(words, first_letter):
+            common = 0
+            for a, b in zip(previous, string):
+                if a != b:
+                    break
+                common += 1
+
+            freeze(common)
+            previous = string
+            for _ in string[common:]:
+                path_edges.append([])
+                path_ends.append(False)
+            path_ends[-1] = True
+
+    freeze(0)
+    root = encode(path_edges.pop())
+    return edges, root, alphabet
+
+
+def _gaddag_strings(words: list, first_letter: str) -> list:
+    """
+    Returns, sorted, the GADDAG strings of the words starting with `first_letter`: for each occurrence of the letter
+    in a word, the reversed prefix ending with it, then the delimiter and the rest of the word, if any.
+    """
+    strings = []
+    for word in words:
+        idx = word.find(first_letter)
+        while idx != -1:
+            split = idx + 1
+            if split == len(word):
+                strings.append(word[::-1])
+            else:
+                strings.append(word[split - 1::-1] + delimiter + word[split:])
+            idx = word.find(first_letter, split)
+
+    strings.sort()
+    return strings
+
+
+def write(gaddag_path: str, edges: array, root: int, alphabet: str, words_digest: bytes) -> None:
+    """
+    Writes a GADDAG to a cache file, atomically: the file is either the previous one or the complete new one.
+    """
+    encoded_alphabet = alphabet.encode()
+    if len(encoded_alphabet) > alphabet_size:
+        raise ValueError(f"the alphabet takes more than {alphabet_size} bytes: {alphabet!r}")
+
+    header = array('I', [magic, version, root, len(edges)])
+    header.frombytes(words_digest)
+    header.frombytes(encoded_alphabet.ljust(alphabet_size, b'\0'))
+
+    temporary_path = f"{gaddag_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as gaddag_file:
+        header.tofile(gaddag_file)
+        edges.tofile(gaddag_file)
+    os.replace(temporary_path, gaddag_path)
+
+
+def read(gaddag_path: str, words_digest: bytes):
+    """
+    Returns the GADDAG mapped from a cache file, or None if the file is missing, was written by another version or
+    byte order, or for other words.
+    """
+    try:
+        gaddag_file = open(gaddag_path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    with gaddag_file:
+        header = array('I')
+        try:
+            header.fromfile(gaddag_file, header_size)
+        except EOFError:
+            return None
+        if header[0] != magic or header[1] != version or header[4:9].tobytes() != words_digest:
+            return None
+        if os.fstat(gaddag_file.fileno()).st_size != (header_size + header[3]) * header.itemsize:
+            return None
+
+        mapping = mmap.mmap(gaddag_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    alphabet = header[9:].tobytes().rstrip(b'\0').decode()
+    gaddag = Gaddag(memoryview(mapping)[header_size * header.itemsize:].cast('I'), header[2], alphabet)
+    gaddag._mapping = mapping
+    return gaddag
+
+
+def load(words_path: str = words_path, gaddag_path: str = None) -> Gaddag:
+    """
+    Returns the GADDAG of the words file, mapped from its cache file at `gaddag_path` (by default, next to the words
+    file). The cache file is built first if it is missing or out of date. Raises OSError if the cache file cannot be
+    read back once built.
+    """
+    gaddag_path = gaddag_path or words_path + '.gaddag'
+    with open(words_path, 'rb') as words_file:
+        content = words_file.read()
+    words_digest = hashlib.sha1(content).digest()
+
+    gaddag = read(gaddag_path, words_digest)
+    if gaddag is None:
+        edges, root, alphabet = build(content.decode().splitlines())
+        write(gaddag_path, edges, root, alphabet, words_digest)
+        gaddag = read(gaddag_path, words_digest)
+        if gaddag is None:
+            raise OSError(f"the GADDAG cache file was built but cannot be read back: {gaddag_path}")
+
+    return gaddag
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the GADDAG cache of a words file and query it.')
+    parser.add_argument('fragments', nargs='*', help='letters to extend into words, in both directions')
+    parser.add_argument('--words', default=words_path, help='words file')
+    parser.add_argument('--rack', default=None, help='letters the extensions may use')
+    args = parser.parse_args()
+
+    gaddag = load(args.words)
+    print(f"Edges: {len(gaddag.edges)} ({len(gaddag.edges) * gaddag.edges.itemsize / 2 ** 20:.1f} MiB)")
+    for fragment in args.fragments:
+        words = sorted(left + fragment + right for left, right in gaddag.extend(fragment, args.rack))
+        print(f"{fragment}: {' '.join(words)}")
+    gaddag.close()
@@ -0,0 +1,138 @@
+"""Pre-forked game workers sharing a single copy of the dictionary.
+
+Importing `scrabble` builds the dictionary, which takes most of a new process' startup time and memory. A
+`WorkerPool` builds it once in the parent process, disables the garbage collector from its creation until the
+workers are forked, so that no collection frees objects and leaves holes in the pages about to be shared, moves
+everything allocated so far out of the collector's reach with `gc.freeze()`, then forks the workers, which
+re-enable it: they start in milliseconds and share the
+dictionary's memory pages with the parent, copy-on-write, instead of each building their own copy.
+
+    def run_games(worker_idx):
+        while not pool.stop_event.is_set():
+            game = ScrabbleGame()
+            ...
+
+    pool = WorkerPool(run_games, workers_count=8)
+    with pool:
+        print(pool.unique_memory())
+
+Leaving the `with` block sets `stop_event`, waits up to `join_timeout` seconds for the workers to exit, then
+terminates those still running. Forking requires a POSIX platform; measuring memory requires Linux.
+"""
+import gc
+import multiprocessing
+import time
+
+import scrabble  # noqa: F401 (builds the dictionary before forking)
+
+
+def warm_up() -> None:
+    """
+    Freezes every object allocated so far, including the dictionary, so that garbage collections in the forked
+    workers never write to, and therefore never copy, their memory pages. Collecting first would free objects
+    and leave holes in those pages, which the workers would then copy as soon as they allocate into them.
+    """
+    gc.freeze()
+
+
+def run_worker(target, worker_idx: int) -> None:
+    """
+    Re-enables the garbage collector, disabled by the parent process until it forked, then runs `target`.
+    """
+    gc.enable()
+    target(worker_idx)
+
+
+def unique_memory(pid: int) -> int:
+    """
+    Returns the unique set size of the process, in bytes: the memory that is private to the process and would
+    be freed if it exited, as opposed to the pages it still shares with its parent.
+    """
+    private_kb = 0
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            field, _, value = line.partition(':')
+            if field in ('Private_Clean', 'Private_Dirty', 'Private_Hugetlb'):
+                private_kb += int(value.split()[0])
+
+    return private_kb * 1024
+
+
+class WorkerPool():
+    """Forks `workers_count` processes, each running `target(worker_idx)`, from a warmed-up parent process.
+
+    Workers are daemonic by default, so they never outlive the parent process; daemonic processes cannot start
+    child processes, though, so workers using e.g. a `ProcessPoolExecutor` need `daemon=False`.
+    """
+
+    def __init__(self, target, workers_count: int, daemon: bool = True, join_timeout: float = 10.0):
+        self.target = target
+        self.workers_count = workers_count
+        self.daemon = daemon
+        self.join_timeout = join_timeout
+        self.workers = []
+        self._context = multiprocessing.get_context('fork')
+        self.stop_event = self._context.Event()
+        self._gc_was_enabled = gc.isenabled()
+        gc.disable()
+
+
+    def start(self) -> None:
+        """
+        Warms up the parent process, forks the workers, then re-enables the garbage collector in the parent
+        process if it was enabled when the pool was created.
+        """
+        warm_up()
+        try:
+            for worker_idx in range(self.workers_count):
+                worker = self._context.Process(target=run_worker, args=(self.target, worker_idx), daemon=self.daemon)
+                worker.start()
+                self.workers.append(worker)
+        finally:
+            if self._gc_was_enabled:
+                gc.enable()
+
+
+    def join(self, timeout: float = None) -> None:
+        """
+        Waits for the workers to exit, for at most `timeout` seconds in total if set.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Sets `stop_event`, waits for the workers to exit for at most `timeout` seconds, then terminates those still
+        running.
+        """
+        self.stop_event.set()
+        self.join(timeout)
+        self.terminate()
+
+
+    def terminate(self) -> None:
+        """
+        Stops the workers that are still running.
+        """
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+        self.join()
+
+
+    def unique_memory(self) -> dict:
+        """
+        Returns the unique set size, in bytes, of each running worker, by pid.
+        """
+        return {worker.pid: unique_memory(worker.pid) for worker in self.workers if worker.is_alive()}
+
+
+    def __enter__(self) -> 'WorkerPool':
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop(self.join_timeout if exc_type is None else 0)
@@ -1,5 +1,27 @@
-# To test that a word is in the dictionary, simply use: `'word' in dictionary`.
-from dictionary import dictionary
+import logging
+import threading
+from operator import itemgetter
+from typing import NamedTuple
+
+# To test that a word is in the dictionary, simply use: `'word' in word_set`.
+from dictionary import word_set
+
+
+logger = logging.getLogger(__name__)
+
+
+# Why a play was rejected, as reported by `Play.rejection_reason`.
+rejection_reasons = (
+    'out_of_board',
+    'occupied',
+    'not_at_center',
+    'not_connected',
+    'not_in_line',
+    'gap',
+    'invalid_word',
+    'invalid_letter',
+    'malformed',
+)
 
 
 scores_by_letter = {
@@ -32,22 +54,114 @@ scores_by_letter = {
 }
 
 
+# Board occupancy is kept as a single 225-bit integer: the tile at (row, col) is bit `row * 15 + col`.
+row_masks = [((1 << 15) - 1) << (row * 15) for row in range(15)]
+col_masks = [sum(1 << (row * 15 + col) for row in range(15)) for col in range(15)]
+board_mask = (1 << 225) - 1
+center_mask = 1 << (7 * 15 + 7)
+
+
+def neighbors_mask(mask: int) -> int:
+    """
+    Returns the bitboard of the positions directly above, below, left or right of the positions in `mask`.
+    """
+    left = (mask & ~col_masks[0]) >> 1
+    right = (mask & ~col_masks[14]) << 1
+    above = mask >> 15
+    below = (mask << 15) & board_mask
+    return (left | right | above | below) & ~mask
+
+
+class WordSegment(NamedTuple):
+    """
+    A maximal run of tiles along a row or column, from position `start` to `end` (inclusive), with its letters
+    and their summed score.
+    """
+    start: int
+    end: int
+    word: str
+    score: int
+
+
+def line_segments(letters: tuple) -> tuple:
+    """
+    Returns, for each of the 15 positions of a row or column, the `WordSegment` covering it, or None if the
+    position is empty.
+    """
+    segments = [None] * 15
+    start = None
+    for pos in range(16):
+        if pos < 15 and letters[pos] != '':
+            if start is None:
+                start = pos
+        elif start is not None:
+            word = ''.join(letters[start:pos])
+            segment = WordSegment(start, pos - 1, word, sum(scores_by_letter[letter] for letter in word))
+            segments[start:pos] = [segment] * (pos - start)
+            start = None
+
+    return tuple(segments)
+
+
+empty_line_segments = (None,) * 15
+
+empty_board = (('',) * 15,) * 15
+
+
+class BoardSnapshot(NamedTuple):
+    """
+    Immutable view of a game's committed state: the board (a tuple of row tuples), its occupancy bitboard and the
+    game's score. Every valid play publishes a new snapshot, so a reader holding one never sees a half-placed play.
+
+    `lines` caches the word segments of each row (`lines[row]`) and column (`lines[15 + col]`), as returned by
+    `line_segments`. A play splices its tiles into the segments of the lines it places tiles on.
+    """
+    board: tuple
+    occupied_mask: int
+    game_score: int
+    lines: tuple
+
+
 class ScrabbleGame():
     """Instantiates and enables playing a scrabble game.
 
     http://www.scrabble.com/
+
+    Reads (`evaluate_tiles`, `board`, `game_score`, `render_board`) work on the current `BoardSnapshot` without
+    locking and can run concurrently from any number of threads. Only `play_tiles` takes the game's lock.
     """
 
     def __init__(self):
-        self.board = self._make_new_board()
-        self._board_without_curr_play = self._make_new_board()
-        self.prev_play_score = 0
-        self.curr_play_score = 0
-        self.game_score = 0
-        self.tiles = []
-        self.tiles_orientation = None
-        self.neighbors = []
-        self.neighbors_words = []
+        self._lock = threading.Lock()
+        self._snapshot = BoardSnapshot(
+            board=empty_board,
+            occupied_mask=0,
+            game_score=0,
+            lines=(empty_line_segments,) * 30)
+
+
+    @property
+    def snapshot(self) -> BoardSnapshot:
+        """
+        Returns the game's current committed state.
+        """
+        return self._snapshot
+
+
+    @property
+    def board(self) -> list:
+        """
+        Returns a copy of the board's current committed state.
+        """
+        return [list(row) for row in self._snapshot.board]
+
+
+    @property
+    def game_score(self) -> int:
+        """
+        Returns the game's current score.
+        """
+        return self._snapshot.game_score
 
 
     def play_tiles(self, tiles: list) -> dict:
@@ -76,82 +190,31 @@ class ScrabbleGame():
                         'score': 12
                     }
         """
-        self.curr_play_score = 0
-        self.tiles = self._sort_tiles(tiles)
-        invalid_play_tup = {'valid': False, 'score': self.curr_play_score}
-        
-        if (not self._are_tiles_in_valid_board_range()) \
-            or (not self._are_tiles_for_non_occupied_positions()):
-            return invalid_play_tup
+        play = self.play(tiles)
+        return {'valid': play.valid, 'score': play.score}
 
-        self._place_tiles_on_board(self.board)
 
-        # case: first play
-        if self.game_score == 0:
-            if self._is_first_play_valid():
-                self._score_first_play()
-                
-
-            else:
-                self._remove_play_tiles()
-                return invalid_play_tup
-        
-        # case: not the first play
-        else:
-            if self._is_valid_non_first_play():
-                self._score_non_first_play()
-
-            else:
-                self._remove_play_tiles()
-                return invalid_play_tup
-
-        # self._print_play_results()
-        self._place_tiles_on_board(self._board_without_curr_play)
-        self._reset_play_attributes()
-        return {'valid': True, 'score': self.curr_play_score}
-
-
-    def _are_tiles_for_non_occupied_positions(self) -> bool:
+    def play(self, tiles: list) -> 'Play':
         """
-        Returns True if tiles are destined for non-occupied positions; else returns False.
+        Same as `play_tiles`, but returns the evaluated `Play`, which also tells the words formed by the tiles or
+        why they were rejected.
         """
-        for tile in self.tiles:
-            if self.board[tile['row']][tile['col']] != '':
-                return False
+        with self._lock:
+            play = Play(self._snapshot, tiles)
+            play.evaluate()
+            if play.valid:
+                self._snapshot = play.committed_snapshot()
 
-        return True
+        return play
 
-    
-    def _are_tiles_in_valid_board_range(self) -> bool:
-        """
-        Returns True if tiles are in valid board range; else returns False.
-        """
 
-        for tile in self.tiles:
-            if tile['row'] < 0 or tile['row'] > 14:
-                return False
-            
-            if tile['col'] < 0 or tile['col'] > 14:
-                return False
-        
-        return True
-            
-
-    def _get_current_play_score(self):
-        """
+    def evaluate_tiles(self, tiles: list) -> dict:
         """
-        self.curr_play_score = self.game_score - self.prev_play_score
+        Validates and scores the tiles against the current board without placing them.
 
-    
-    def _reset_play_attributes(self):
-        """
-        Resets the play's attributes.
+        Params and Returns are the same as `play_tiles`.
         """
-        self.tiles = []
-        self.tiles_orientation = None
-        self.neighbors = []
-        self.neighbors_words = []
-        self.prev_play_score = self.curr_play_score
+        return Play(self._snapshot, tiles).evaluate()
 
 
     def print_score(self) -> None:
@@ -160,65 +223,192 @@ class ScrabbleGame():
         """
         print(f"Game score: {self.game_score}")
 
-    
-    def print_tiles(self) -> None:
-        """
-        Prints tiles.
-        """
-        print(f"Tiles: {[tile['letter'] for tile in self.tiles]}")
-    
-    
-    def _print_play_results(self) -> None:
+
+    def render_board(self) -> str:
         """
-        Print board and score.
+        Returns an easy-to-read view of the board.
         """
-        self.print_tiles()
-        self.print_score()
-        self._print_board(self.board)
+        return '\n'.join(str(list(row)) for row in self._snapshot.board)
 
-    
-    def _print_board(self, board) -> None:
+    def _print_board(self) -> None:
         """
         Prints an easy-to-read view of the board.
         """
         print('Board:')
-        for row in board:
-            print(row)
+        print(self.render_board())
         print('\n')
 
 
-    def _make_new_board(self) -> list:
+_tile_position = itemgetter('row', 'col')
+
+
+class Play():
+    """Validates and scores a single set of tiles against a snapshot of a game's board.
+
+    All of a play's transient state (tiles, neighbors, orientation, score) lives here rather than on the
+    `ScrabbleGame`, so concurrent plays and evaluations never share it. After `evaluate`, `valid`, `score`,
+    `words` (the words formed) and `rejection_reason` (one of `rejection_reasons`) describe the outcome.
+    """
+
+    # defaults of the state set while evaluating, kept on the class so that building a play stays cheap
+    play_mask = 0
+    span_mask = 0
+    tiles_orientation = None
+    tiles_word = ''
+    tiles_score = 0
+    neighbors = 0
+    contiguous = False
+    _segments_by_line = None
+    valid = False
+    score = 0
+    rejection_reason = None
+
+    def __init__(self, snapshot: BoardSnapshot, tiles: list):
+        self.snapshot = snapshot
+        self.occupied_mask = snapshot.occupied_mask
+        self.tiles = self._sort_tiles(tiles)
+        self.neighbors_words = []
+        self.neighbors_words_scores = []
+        self.words = []
+
+
+    def evaluate(self) -> dict:
         """
-        Initializes a new empty board.
+        Performs the validation and scoring of the tiles; see `ScrabbleGame.play_tiles` for the returned dict.
         """
-        board = []
-        for _ in range(15):
-            board.append(['' for _ in range(15)])
-        
-        return board
+        invalid_play_tup = {'valid': False, 'score': 0}
 
-    
-    def _play_non_first_play(self) -> None:
+        # scores are looked up while the words are built, before they are checked against the dictionary, so
+        # letters without a score are rejected here
+        self.rejection_reason = self._read_tiles()
+        if self.rejection_reason is not None:
+            return invalid_play_tup
+
+        if not self._are_tiles_for_non_occupied_positions():
+            self.rejection_reason = 'occupied'
+            return invalid_play_tup
+
+        self._locate_tiles()
+
+        # case: first play
+        if self.occupied_mask == 0:
+            if not self._is_first_play_valid():
+                return invalid_play_tup
+            self._score_first_play()
+
+        # case: not the first play
+        else:
+            if not self._is_valid_non_first_play():
+                return invalid_play_tup
+            self._score_non_first_play()
+
+        self.valid = True
+        return {'valid': True, 'score': self.score}
+
+
+    def committed_snapshot(self) -> BoardSnapshot:
+        """
+        Returns the snapshot of the game once this (valid) play is placed on the board.
+
+        Only the rows the tiles are on are copied, and the tiles are spliced into the cached word segments of the
+        lines they are on, merged with the segments they touch, instead of rescanning those lines.
         """
-        Handles all plays after the first play of the game.
+        board = list(self.snapshot.board)
+        lines = list(self.snapshot.lines)
+        segments_by_line = self._new_segments_by_line()
+
+        for line_idx, new_segments in segments_by_line.items():
+            segments = lines[line_idx]
+            for segment, _ in new_segments:
+                segments = segments[:segment.start] + (segment,) * len(segment.word) + segments[segment.end + 1:]
+            lines[line_idx] = segments
+
+        rows = {}
+        for tile in self.tiles:
+            row, col, letter = tile['row'], tile['col'], tile['letter']
+            if row not in rows:
+                rows[row] = list(board[row])
+            rows[row][col] = letter
 
-        Side-effects
-            self.board: list
-                Places the play's tiles on the board.
+            # the lines along which the tile stands alone
+            for line_idx, pos in ((row, col), (15 + col, row)):
+                if line_idx not in segments_by_line:
+                    segments = lines[line_idx]
+                    segment = WordSegment(pos, pos, letter, scores_by_letter[letter])
+                    lines[line_idx] = segments[:pos] + (segment,) + segments[pos + 1:]
 
-            self.game_score: int
-                Increments the game's score.
+        for row, letters in rows.items():
+            board[row] = tuple(letters)
+
+        return BoardSnapshot(
+            board=tuple(board),
+            occupied_mask=self.occupied_mask | self.play_mask,
+            game_score=self.snapshot.game_score + self.score,
+            lines=tuple(lines))
+
+
+    def _are_tiles_for_non_occupied_positions(self) -> bool:
         """
- 
+        Returns True if tiles are destined for non-occupied positions; else returns False.
+        """
+        return self.play_mask & self.occupied_mask == 0
 
-    def _remove_play_tiles(self) -> None:
+    
+    def _read_tiles(self):
         """
-        Remove the non-first play's tiles from the board.
+        Checks the tiles in a single pass and sets the play's bitboard, and the word and score of the tiles' letters.
+        Returns why the tiles cannot be placed at all, or None: 'malformed' if a tile is not a dict holding a string
+        `letter` and integer `row` and `col`, else 'out_of_board', else 'invalid_letter' if a letter has no score.
+
+        Returns
+            Optional[str]
         """
+        play_mask = 0
+        letters = []
+        letters_score = 0
+        out_of_board = False
+        invalid_letter = False
+
         for tile in self.tiles:
-            self.board[tile['row']][tile['col']] = ''
-    
+            try:
+                letter, row, col = tile['letter'], tile['row'], tile['col']
+            except (KeyError, TypeError):
+                return 'malformed'
+            if not isinstance(tile, dict) or not isinstance(letter, str) or type(row) is not int \
+                    or type(col) is not int:
+                return 'malformed'
+
+            if not (0 <= row <= 14 and 0 <= col <= 14):
+                out_of_board = True
+                continue
+
+            letter_score = scores_by_letter.get(letter)
+            if letter_score is None:
+                invalid_letter = True
+                continue
+
+            play_mask |= 1 << (row * 15 + col)
+            letters.append(letter)
+            letters_score += letter_score
+
+        if out_of_board:
+            return 'out_of_board'
+        if invalid_letter:
+            return 'invalid_letter'
+
+        self.play_mask = play_mask
+        self.tiles_word = ''.join(letters)
+        self.tiles_score = letters_score
+        return None
 
+
+    def print_tiles(self) -> None:
+        """
+        Prints tiles.
+        """
+        print(f"Tiles: {[tile['letter'] for tile in self.tiles]}")
+    
+    
     def _is_valid_non_first_play(self) -> bool:
         """
         Returns True if the non-first play is valid; else returns False. 
@@ -230,46 +420,57 @@ class ScrabbleGame():
         """
         
         # case: at least 1 tile is adjacent to an existing tile
-        self._get_neighbors()
-        if len(self.neighbors) == 0:
-            print(f"Tiles don't connect to any existing tiles!")
+        self.neighbors = neighbors_mask(self.play_mask) & self.occupied_mask
+        if self.neighbors == 0:
+            logger.debug("Tiles don't connect to any existing tiles!")
+            self.rejection_reason = 'not_connected'
             return False
         
         # case: tiles form a line
         if not self._are_tiles_in_a_line():
-            print(f"Tiles are not in a line!")
+            logger.debug("Tiles are not in a line!")
+            self.rejection_reason = 'not_in_line'
+            return False
+
+        # case: tiles leave an empty square between them
+        if not self._are_tiles_gapless():
+            logger.debug("Tiles leave a gap in the line!")
+            self.rejection_reason = 'gap'
             return False
         
         # case: tiles are contiguous but not a valid word
-        if (self._are_tiles_contiguous()) and (self._word_from_tiles() not in dictionary):
-            print(f"Tiles are contiguous but not valid word!")
+        self.contiguous = self._are_tiles_contiguous()
+        if self.contiguous and self.tiles_word not in word_set:
+            logger.debug("Tiles are contiguous but not valid word!")
+            self.rejection_reason = 'invalid_word'
             return False
 
 
         # case: not all newly formed words are valid
         if not self._are_all_newly_formed_words_valid():
-            print(f"Not all  newly formed words are valid!")
+            logger.debug("Not all  newly formed words are valid!")
+            self.rejection_reason = 'invalid_word'
             return False
 
         # case: everything is valid
         return True
 
 
-    def _score_non_first_play(self) -> int:
+    def _score_non_first_play(self) -> None:
         """
-        Return score of non-first play.
+        Scores the non-first play.
         """
         play_score = 0
         
-        if self._are_tiles_contiguous() and self._are_tiles_self_contained(): 
-            play_score += self._score_word(self._word_from_tiles())
+        if self.contiguous and self._are_tiles_self_contained():
+            self.words.append(self.tiles_word)
+            play_score += self.tiles_score
         
-        for word in self.neighbors_words:
-            play_score += self._score_word(word)
+        for word, word_score in zip(self.neighbors_words, self.neighbors_words_scores):
+            self.words.append(word)
+            play_score += word_score
 
-        self.game_score += play_score
-
-        self._get_current_play_score()
+        self.score = play_score
         
 
     def _are_tiles_self_contained(self) -> bool:
@@ -277,48 +478,28 @@ class ScrabbleGame():
         Returns True if the tiles are self-contained; else, returns False. Self-contained only if:
             1. First tile has no tile before it (no left tile if horizontal; no tile above if vertical).
             2. Last tile has no tile after it (no right tile if horizontal; no tile below if veritcal).
+            3. A single tile has no tile around it at all.
         """
         if self.tiles_orientation == 'not_linear':
             return False
 
-        first_tile = self.tiles[0]
-        last_tile = self.tiles[-1]
+        if self.tiles_orientation == 'single_tile':
+            return self.neighbors == 0
 
-        if self.tiles_orientation == 'horizontal':
-            if first_tile['col'] != 0:
-                if self.board[first_tile['row']][first_tile['col'] - 1] != '':
-                    return False
-            if last_tile['col'] != 14:
-                if self.board[last_tile['row']][last_tile['col'] + 1] != '':
-                    return False
-
-        if self.tiles_orientation == 'vertical':
-            if first_tile['row'] != 0:
-                if self.board[first_tile['row'] - 1][first_tile['col']] != '':
-                    return False
-            if last_tile['row'] != 14:
-                if self.board[last_tile['row'] + 1][last_tile['col']] != '':
-                    return False
-
-        if len(self.tiles) == 1 and tiles[0]['letter'] != 'a':
-            return False
+        # the positions just before the first and just after the last tile, along the tiles' line
+        step = 1 if self.tiles_orientation == 'horizontal' else 15
+        ends_mask = ((self.span_mask << step) | (self.span_mask >> step)) & self._line_mask() & ~self.span_mask
 
-        return True
+        return ends_mask & self.occupied_mask == 0
 
 
     def _are_all_newly_formed_words_valid(self) -> bool:
         """
-        Returns True if all newly formed words are valid; else returns False.
+        Returns True if all newly formed words are valid; else returns False. The word of the tiles alone, if they
+        are contiguous, is checked by `_is_valid_non_first_play`.
         """
-
-        if self._are_tiles_contiguous() and self._are_tiles_self_contained():
-            print(f"Tiles are contig. and self-contained; therefore, evaluating whether {''.join([tile['letter'] for tile in self.tiles])} is a word.")
-            word = self._word_from_tiles()
-            if word not in dictionary:
-                return False
-
         if not self._are_all_neighbors_words_valid():
-            print(f"Not all neighbor words -- {self.neighbors_words} -- are valid!")
+            logger.debug("Not all neighbor words -- %s -- are valid!", self.neighbors_words)
             return False
 
         return True
@@ -332,7 +513,7 @@ class ScrabbleGame():
         self._get_neighbors_words() 
 
         for word in self.neighbors_words:
-            if word not in dictionary:
+            if word not in word_set:
                 return False
 
         return True
@@ -340,293 +521,242 @@ class ScrabbleGame():
 
     def _get_neighbors_words(self) -> None:
         """
-        Updates the self.neighbors_words (list) with the words represented by the neighbors.
+        Updates the self.neighbors_words (list) with the words represented by the neighbors, i.e. the words through
+        the tiles that include tiles already on the board, and self.neighbors_words_scores (list) with their scores.
         """
-        unique_word_starts = self._unique_neighbors_words_starts()
+        # each segment is listed once, so no neighbor word is counted twice
+        for segments in self._new_segments_by_line().values():
+            for segment, is_neighbor_word in segments:
+                if is_neighbor_word:
+                    self.neighbors_words.append(segment.word)
+                    self.neighbors_words_scores.append(segment.score)
 
-        for word_start_tup in unique_word_starts:
-            neighbor_word = self._word_given_start_and_orientation(*word_start_tup)
-            self.neighbors_words.append(neighbor_word)
 
-
-    def _unique_neighbors_words_starts(self) -> set:
+    def _new_segments_by_line(self) -> dict:
         """
-        To avoid double counting neighbor words, returns a unique list of word starts and their orientations given self.neighbors.
+        Returns, by line the tiles are on (see `BoardSnapshot.lines`), the word segments the tiles form along it with
+        the tiles already on the board, each with whether it includes any of those. Lines along which a tile stands
+        alone, with no tile before or after it, are left out: see `committed_snapshot`. Computed once per play, for
+        tiles in a line without gaps.
+
+        Returns
+            Dict[int, List[Tuple(WordSegment, bool)]]
         """
-        unique_word_starts = set()  
-        
-        for curr_neighbor in self.neighbors:
-            unique_word_starts.add(
-                self._neighbor_word_start_position(
-                    curr_neighbor['row'], 
-                    curr_neighbor['col'], 
-                    curr_neighbor['orientation']))
-        return unique_word_starts
+        if self._segments_by_line is not None:
+            return self._segments_by_line
 
+        self._segments_by_line = {}
+        horizontal = self.tiles_orientation == 'horizontal'
+        vertical = self.tiles_orientation == 'vertical'
 
-    def _word_given_start_and_orientation(self, row: int, col: int, orientation: str) -> str:
-        """
-        Returns the word and its score given the starting position (row and col) and the word's orientation.
+        # the tiles' own line: the tiles being sorted, their positions along it are in increasing order
+        if horizontal or vertical:
+            first_tile = self.tiles[0]
+            if horizontal:
+                line_idx = first_tile['row']
+                new_letters = {tile['col']: tile['letter'] for tile in self.tiles}
+            else:
+                line_idx = 15 + first_tile['col']
+                new_letters = {tile['row']: tile['letter'] for tile in self.tiles}
+
+            segments = []
+            end = -1
+            for pos in new_letters:
+                if pos <= end:
+                    continue
+                start, word, score, includes_board_tiles = self._word_through_position(line_idx, pos, new_letters)
+                end = start + len(word) - 1
+                segments.append((WordSegment(start, end, word, score), includes_board_tiles))
+            self._segments_by_line[line_idx] = segments
+
+        # the lines across the tiles (both lines of a single tile), each holding a single new letter: only those
+        # of the tiles touching the board's tiles across their line are scanned
+        occupied_mask = self.occupied_mask
+        if horizontal:
+            touching_mask = self.play_mask & ((occupied_mask << 15) | (occupied_mask >> 15))
+        elif vertical:
+            touching_mask = self.play_mask & (
+                ((occupied_mask & ~col_masks[14]) << 1) | ((occupied_mask & ~col_masks[0]) >> 1))
+        else:
+            touching_mask = self.play_mask if self.neighbors else 0
 
-        Returns
-            Tuple(word: str, score: int)
-        """
-        
-        word = ''
+        lines = self.snapshot.lines
+        for tile in self.tiles if touching_mask else ():
+            row, col = tile['row'], tile['col']
+            if not touching_mask >> (row * 15 + col) & 1:
+                continue
+            for line_idx, pos, across in ((row, col, not horizontal), (15 + col, row, not vertical)):
+                if not across:
+                    continue
+                board_segments = lines[line_idx]
+                if (pos > 0 and board_segments[pos - 1] is not None) \
+                        or (pos < 14 and board_segments[pos + 1] is not None):
+                    start, word, score, includes_board_tiles = self._word_through_position(
+                        line_idx, pos, {pos: tile['letter']})
+                    segment = WordSegment(start, start + len(word) - 1, word, score)
+                    self._segments_by_line[line_idx] = [(segment, includes_board_tiles)]
 
-        if orientation == 'vertical':
-        
-            for curr_row_idx in range(row, 15):
-                curr_char = self.board[curr_row_idx][col]
-                if curr_char != '':
-                    word += curr_char
-                else:
-                    break
-        
+        return self._segments_by_line
 
-        if orientation == 'horizontal':
-        
-            for curr_col_idx in range(col, 15):
-                curr_char = self.board[row][curr_col_idx]
-                if curr_char != '':
-                    word += curr_char
-                else:
-                    break
-
-        return word
-    
 
-    def _neighbor_word_start_position(self, row: int, col: int, orientation: str) -> tuple:
-        """
-        Returns the (row, column, orientation) of the start of the neighbor word given the neighbor char's row, col, and orientation.
+    def _word_through_position(self, line_idx: int, pos: int, new_letters: dict) -> tuple:
         """
-        # get min row or col
-        start_row_idx = row
-        start_col_idx = col
+        Returns the word through a tile along one of the board's lines (see `BoardSnapshot.lines`), combining the
+        line's cached word segments with the play's letters on that line (`new_letters`, by position).
 
-        if orientation == 'vertical':
-            while start_row_idx > 0:
-                if self.board[start_row_idx - 1][col] != '':
-                    start_row_idx -= 1
-                else:
-                    break
-            
+        Returns
+            Tuple(start: int, word: str, score: int, includes_board_tiles: bool)
+        """
+        segments = self.snapshot.lines[line_idx]
+        word = new_letters[pos]
+        score = scores_by_letter[word]
+        includes_board_tiles = False
+
+        start = pos - 1
+        while start >= 0:
+            if start in new_letters:
+                word = new_letters[start] + word
+                score += scores_by_letter[new_letters[start]]
+                start -= 1
+            elif segments[start] is not None:
+                segment = segments[start]
+                word = segment.word + word
+                score += segment.score
+                includes_board_tiles = True
+                start = segment.start - 1
+            else:
+                break
+
+        end = pos + 1
+        while end < 15:
+            if end in new_letters:
+                word += new_letters[end]
+                score += scores_by_letter[new_letters[end]]
+                end += 1
+            elif segments[end] is not None:
+                segment = segments[end]
+                word += segment.word
+                score += segment.score
+                includes_board_tiles = True
+                end = segment.end + 1
+            else:
+                break
 
-        if orientation == 'horizontal':
-            while start_col_idx > 0:
-                if self.board[row][start_col_idx - 1] != '':
-                    start_col_idx -= 1
-                else:
-                    break
-        
-        return (start_row_idx, start_col_idx, orientation)
+        return start + 1, word, score, includes_board_tiles
 
     
-    def _get_neighbors(self) -> None:
-        """
-        Finds neighbors to the self.neighbors (list) if any neighbors exist. 
-        
-        Side-effects
-            self.neighbors: List
-                Adds neighbors to the list if any exist.
-        """
-
-        for curr_tile in self.tiles:
-            curr_row = curr_tile['row']
-            curr_col = curr_tile['col']
-
-            # check above neighbor
-            neighbor_row = curr_row - 1
-            neighbor_col = curr_col
-            neighbor_letter = self._board_without_curr_play[neighbor_row][neighbor_col]
-            neighbor_orientation = 'vertical'
-            if (curr_row != 0) and neighbor_letter != '':
-                self.neighbors.append(
-                    {'letter': neighbor_letter, 
-                    'row': neighbor_row, 
-                    'col': neighbor_col, 
-                    'orientation': neighbor_orientation})
-
-            # check below neighbor
-            neighbor_row = curr_row + 1
-            neighbor_col = curr_col
-            neighbor_letter = self._board_without_curr_play[neighbor_row][neighbor_col]
-            neighbor_orientation = 'vertical'
-            if (curr_row != 14) and neighbor_letter != '':
-                self.neighbors.append(
-                    {'letter': neighbor_letter, 
-                    'row': neighbor_row, 
-                    'col': neighbor_col, 
-                    'orientation': neighbor_orientation})
-
-            # check left neighbor
-            neighbor_row = curr_row
-            neighbor_col = curr_col - 1
-            neighbor_letter = self._board_without_curr_play[neighbor_row][neighbor_col]
-            neighbor_orientation = 'horizontal'
-            if (curr_col != 0) and neighbor_letter != '':
-                self.neighbors.append(
-                    {'letter': neighbor_letter, 
-                    'row': neighbor_row, 
-                    'col': neighbor_col, 
-                    'orientation': neighbor_orientation})
-                    
-
-            # check right neighbor
-            neighbor_row = curr_row
-            neighbor_col = curr_col + 1
-            neighbor_letter = self._board_without_curr_play[neighbor_row][neighbor_col]
-            neighbor_orientation = 'horizontal'
-            if (curr_col != 14) and neighbor_letter != '':
-                self.neighbors.append(
-                    {'letter': neighbor_letter, 
-                    'row': neighbor_row, 
-                    'col': neighbor_col, 
-                    'orientation': neighbor_orientation})
-
-        
     def _is_first_play_valid(self) -> bool:
         """
         Returns True if first play is valid; else returns False.
         """
         
-        if self._any_tiles_at_board_center() and self._are_tiles_in_a_line():
-            
-            word = self._word_from_tiles()
-            if word in dictionary:
-                return True
-        else:
+        if not self._any_tiles_at_board_center():
+            self.rejection_reason = 'not_at_center'
+            return False
+
+        if not self._are_tiles_in_a_line():
+            self.rejection_reason = 'not_in_line'
             return False
 
+        if not self._are_tiles_gapless():
+            self.rejection_reason = 'gap'
+            return False
+
+        if self.tiles_word not in word_set:
+            self.rejection_reason = 'invalid_word'
+            return False
+
+        return True
+
     
-    def _score_first_play(self) -> int:
+    def _score_first_play(self) -> None:
         """
+        Scores the first play.
         """
-        score = 0
-        for tile in self.tiles:
-            letter = tile['letter']
-            score += scores_by_letter[letter]
-        self.game_score = score
-
-        self._get_current_play_score()
+        self.words.append(self.tiles_word)
+        self.score = self.tiles_score
 
     
     def _are_tiles_contiguous(self) -> bool:
         """
         Returns bool on whether the tiles are contiguous.
         """
-        
-        
-        if not self._are_tiles_in_a_line():
-            return False
-        
-        if self.tiles_orientation == 'single_tile':
-            return True
+        return self.tiles_orientation != 'not_linear' and self.play_mask == self.span_mask
 
-        if self.tiles_orientation == 'horizontal':
-            expected_num = self.tiles[0]['col']
-            for tile_idx in range(len(self.tiles)):
-                actual_num = self.tiles[tile_idx]['col']
-                if expected_num != actual_num:
-                    return False
-                expected_num += 1
-
-        if self.tiles_orientation == 'vertical':
-            expected_num = self.tiles[0]['row']
-            for tile_idx in range(len(self.tiles)):
-                actual_num = self.tiles[tile_idx]['row']
-                if expected_num != actual_num:
-                    return False
-                expected_num += 1
 
-        return True
-            
-    
-    def _score_word(self, word: str) -> int:
+    def _are_tiles_gapless(self) -> bool:
         """
-        Returns the score (int) of the word.
+        Returns bool on whether the tiles, together with the tiles already on the board, leave no empty square
+        between the first and the last tile.
         """
-        score = 0
+        return self.tiles_orientation != 'not_linear' and self.span_mask & ~(self.play_mask | self.occupied_mask) == 0
 
-        for char in word:
-            score += scores_by_letter[char]
-        
-        return score
-    
-    
-    def _place_tiles_on_board(self, board) -> None:
-        """
-        Places tiles on the specified board.
-        """
-        for tile in self.tiles:
-            row_num = tile['row']
-            col_num = tile['col']
-            letter = tile['letter']
 
-            board[row_num][col_num] = letter
-        
-    
-    def _word_from_tiles(self) -> str:
+    def _line_mask(self) -> int:
         """
-        Returns stringified version of the word.
+        Returns the bitboard of the row (if horizontal) or column (if vertical) the tiles are on.
         """
-        word = ''.join([tile['letter'] for tile in self.tiles])
-        return word
+        first_tile = self.tiles[0]
+        if self.tiles_orientation == 'horizontal':
+            return row_masks[first_tile['row']]
+        return col_masks[first_tile['col']]
 
 
     def _any_tiles_at_board_center(self) -> bool:
         """
         Return True if any of the tiles are destined for the board's center; else return False.
         """
-        for tile in self.tiles:
-            if (tile['row'] == 7) and (tile['col'] == 7):
-                return True
-        return False
+        return self.play_mask & center_mask != 0
 
 
     def _are_tiles_in_a_line(self) -> bool:
         """
-        Returns a tuple stating whether the tiles form a line and, if they do, whether the line is horizontal or vertical.
-
-        Returns
-            Tuple(bool, str)
-                bool: whether tiles are linear.
-                str: string describing tiles' orientation
+        Returns True if the tiles form a line (see `_locate_tiles`); else returns False.
         """
-        tiles_count = len(self.tiles)
-        
-        if tiles_count == 0:
+        if not self.tiles:
             raise ValueError('Tiles list is empty! Please provide tiles.')
 
+        return self.tiles_orientation != 'not_linear'
+
+
+    def _locate_tiles(self) -> None:
+        """
+        Sets, from the play's bitboard, the tiles' orientation (`single_tile`, `horizontal`, `vertical` or
+        `not_linear`) and, if they form a line, the bitboard of every position on it from the first to the last tile.
+        """
+        tiles_count = len(self.tiles)
         if tiles_count == 1:
             self.tiles_orientation = 'single_tile'
-            return True
-        
-        rows_set = set([tile['row'] for tile in self.tiles])
-        cols_set = set([tile['col'] for tile in self.tiles])
+            self.span_mask = self.play_mask
+            return
 
-        # horizontal line
-        if (len(rows_set) == 1) and (len(cols_set) == tiles_count):
-            self.tiles_orientation = 'horizontal'
-            return True
+        # tiles overlap each other
+        if tiles_count == 0 or self.play_mask.bit_count() != tiles_count:
+            self.tiles_orientation = 'not_linear'
+            return
 
-        # vertical line
-        if (len(cols_set) == 1) and (len(rows_set) == tiles_count):
+        first_tile = self.tiles[0]
+        if self.play_mask & ~row_masks[first_tile['row']] == 0:
+            self.tiles_orientation = 'horizontal'
+        elif self.play_mask & ~col_masks[first_tile['col']] == 0:
             self.tiles_orientation = 'vertical'
-            return True
-
-        # else: not in a line
+        else:
+            self.tiles_orientation = 'not_linear'
+            return
 
-        self.tiles_orientation = 'not_linear'
-        return False
+        lowest_bit_mask = self.play_mask & -self.play_mask
+        between_mask = ((1 << self.play_mask.bit_length()) - 1) & ~(lowest_bit_mask - 1)
+        self.span_mask = between_mask & self._line_mask()
 
     
     def _sort_tiles(self, tiles) -> list:
         """
-        Sorts the tiles by row and column.
+        Sorts the tiles by row and column. Malformed tiles, which `evaluate` rejects, are left in their order.
         """
-        tiles_sorted = sorted(tiles, key=lambda tile: (tile['row'], tile['col']))
-        return tiles_sorted
+        try:
+            return sorted(tiles, key=_tile_position)
+        except (KeyError, TypeError):
+            return list(tiles)
     
 
 # TESTING
@@ -0,0 +1,571 @@
+"""Move generation and best-move search for computer opponents.
+
+Candidates are generated from the board and a rack, scored by the game's own validator and ranked by their
+equity: the play's score plus the value of the tiles it leaves on the rack. `best_move` can additionally spend a
+time budget on Monte-Carlo look-ahead, simulating the opponent's best reply to each of the top candidates,
+optionally over a process pool.
+
+Run `python search.py --help` for the strength and throughput benchmark against a greedy player.
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from dictionary import Cursor, cursor, root
+from scrabble import BoardSnapshot, Play, center_mask, neighbors_mask
+
+
+# Number of tiles of each letter in a standard English set; blanks are not supported by the game.
+tile_counts = {
+    "a": 9, "b": 2, "c": 2, "d": 4, "e": 12, "f": 2, "g": 3, "h": 2, "i": 9, "j": 1, "k": 1, "l": 4, "m": 2,
+    "n": 6, "o": 8, "p": 2, "q": 1, "r": 6, "s": 4, "t": 6, "u": 4, "v": 2, "w": 2, "x": 1, "y": 2, "z": 1,
+}
+
+# Value, in points, of keeping a tile on the rack for the next turn, then of each duplicated letter and of each
+# vowel or consonant in excess of a balanced leave. Fitted to this game's scoring by `derive_leave_values()` (300
+# games, seed 0): keeping a tile usually costs about a point on the next play, and only a few high-scoring letters
+# are worth keeping.
+leave_values_by_letter = {
+    "a": -0.3, "b": -0.8, "c": -0.9, "d": -0.3, "e": -0.8, "f": -0.3, "g": -1.4, "h": 0.5, "i": -1.0, "j": 0.3,
+    "k": 0.0, "l": -1.3, "m": 0.2, "n": -1.2, "o": -1.0, "p": -0.9, "q": -1.2, "r": -1.0, "s": -1.1, "t": -1.0,
+    "u": -0.9, "v": -1.1, "w": 0.2, "x": 1.3, "y": 1.4, "z": 2.6,
+}
+duplicate_leave_value = -0.5
+unbalanced_leave_value = -0.3
+vowels = set("aeiou")
+rack_size = 7
+
+
+class Candidate(NamedTuple):
+    """
+    A valid play for a rack: the `tiles` to pass to `ScrabbleGame.play_tiles`, the play's `score`, the `leave`
+    (letters remaining on the rack) and the play's `equity` (score plus leave value).
+    """
+    tiles: list
+    score: int
+    leave: str
+    equity: float
+
+
+@lru_cache(maxsize=None)
+def _leave_value(sorted_leave: str) -> float:
+    value = sum(leave_values_by_letter[letter] for letter in sorted_leave)
+
+    # duplicated letters are hard to play together
+    for count in Counter(sorted_leave).values():
+        value += duplicate_leave_value * (count - 1)
+
+    # an unbalanced leave draws into unbalanced racks
+    vowels_count = sum(1 for letter in sorted_leave if letter in vowels)
+    consonants_count = len(sorted_leave) - vowels_count
+    value += unbalanced_leave_value * max(0, abs(vowels_count - consonants_count) - 1)
+
+    return value
+
+
+def leave_value(leave: str) -> float:
+    """
+    Returns the value of keeping the `leave` letters on the rack. Values are computed once per distinct leave and
+    kept in a table for the lifetime of the process.
+    """
+    return _leave_value(''.join(sorted(leave)))
+
+
+def derive_leave_values(games_count: int = 200, seed: int = 0) -> tuple:
+    """
+    Returns leave values fitted to this game's scoring, to be copied into `leave_values_by_letter`,
+    `duplicate_leave_value` and `unbalanced_leave_value`. Plays `games_count` seeded games of greedy self-play, then
+    fits, by least squares, the score of each player's next play to the letters it kept from its previous play, its
+    duplicated letters and its vowel/consonant imbalance. Values are relative to an empty leave.
+
+    Returns
+        Tuple(values_by_letter: dict, duplicate_value: float, unbalanced_value: float)
+    """
+    import numpy as np
+    from scrabble import ScrabbleGame
+
+    letters = sorted(tile_counts)
+    features = []
+    next_scores = []
+    for game_idx in range(games_count):
+        rng = random.Random(seed + game_idx)
+        bag = [letter for letter, count in tile_counts.items() for _ in range(count)]
+        rng.shuffle(bag)
+
+        game = ScrabbleGame()
+        racks = ['', '']
+        # the leave of each player's last play, if the player drew tiles to complete it
+        leaves = [None, None]
+        consecutive_passes = 0
+        turn_idx = 0
+
+        while consecutive_passes < 2 * len(racks):
+            player = turn_idx % len(racks)
+            turn_idx += 1
+
+            draw_count = min(rack_size - len(racks[player]), len(bag))
+            racks[player] += ''.join(bag[:draw_count])
+            del bag[:draw_count]
+
+            move = greedy_move(game.snapshot, racks[player])
+            if leaves[player] is not None and draw_count:
+                counts = Counter(leaves[player])
+                vowels_count = sum(counts[letter] for letter in vowels)
+                features.append(
+                    [counts[letter] for letter in letters]
+                    + [sum(count - 1 for count in counts.values()),
+                       max(0, abs(2 * vowels_count - len(leaves[player])) - 1),
+                       1])
+                next_scores.append(move.score if move else 0)
+            leaves[player] = None
+
+            if move is None:
+                consecutive_passes += 1
+                continue
+
+            consecutive_passes = 0
+            game.play_tiles(move.tiles)
+            racks[player] = leaves[player] = move.leave
+            if not bag and not racks[player]:
+                break
+
+    weights = np.linalg.lstsq(np.array(features, dtype=float), np.array(next_scores, dtype=float), rcond=None)[0]
+    # adding 0.0 turns -0.0 into 0.0
+    weights = [round(float(weight), 1) + 0.0 for weight in weights]
+    return dict(zip(letters, weights)), weights[-3], weights[-2]
+
+
+def unseen_tiles(snapshot: BoardSnapshot, rack: str) -> list:
+    """
+    Returns the letters that are neither on the board nor on the rack, i.e. those in the bag or on the opponent's
+    rack.
+    """
+    remaining = Counter(tile_counts)
+    remaining.subtract(letter for row in snapshot.board for letter in row if letter)
+    remaining.subtract(rack)
+    return sorted(letter for letter, count in remaining.items() for _ in range(max(count, 0)))
+
+
+def legal_moves(snapshot: BoardSnapshot, rack: str) -> list:
+    """
+    Returns every valid play (List[Candidate]) that can be made from the letters of `rack` on the board of
+    `snapshot`, in no particular order.
+    """
+    occupied_mask = snapshot.occupied_mask
+    if occupied_mask == 0:
+        anchors_mask = center_mask
+    else:
+        anchors_mask = neighbors_mask(occupied_mask) & ~occupied_mask
+
+    tile_sets = {}
+    for orientation in ('horizontal', 'vertical'):
+        for line in range(15):
+            generator = _LineMoveGenerator(snapshot, orientation, line, anchors_mask, rack)
+            for tiles in generator.moves():
+                tile_sets.setdefault(frozenset((tile['letter'], tile['row'], tile['col']) for tile in tiles), tiles)
+
+    candidates = []
+    for tiles in tile_sets.values():
+        play = Play(snapshot, tiles)
+        play.evaluate()
+        if play.valid:
+            leave = _subtract_letters(rack, [tile['letter'] for tile in tiles])
+            candidates.append(Candidate(play.tiles, play.score, leave, play.score + leave_value(leave)))
+
+    return candidates
+
+
+def rank_moves(snapshot: BoardSnapshot, rack: str) -> list:
+    """
+    Returns the valid plays for `rack` (List[Candidate]) from the highest to the lowest equity.
+    """
+    return sorted(legal_moves(snapshot, rack), key=_candidate_rank_key)
+
+
+def greedy_move(snapshot: BoardSnapshot, rack: str) -> Optional[Candidate]:
+    """
+    Returns the highest-scoring valid play for `rack`, ignoring its leave, or None if there is no valid play.
+    """
+    candidates = legal_moves(snapshot, rack)
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: (candidate.score, candidate.equity))
+
+
+def best_move(snapshot: BoardSnapshot, rack: str, time_limit_ms: Optional[int] = None, candidates_count: int = 8,
+              executor: Optional[ProcessPoolExecutor] = None, seed: int = 0) -> Optional[Candidate]:
+    """
+    Returns the best valid play for `rack`, or None if there is no valid play.
+
+    Params
+        snapshot: BoardSnapshot
+            The board to play on, e.g. `game.snapshot`.
+
+        rack: str
+            The letters available to the player.
+
+        time_limit_ms: int
+            If set, the `candidates_count` plays with the highest equity are re-ranked by simulating the
+            opponent's best reply to each of them from random racks drawn from the unseen tiles, until the time
+            limit is spent. The limit covers the whole search, including the generation of the candidates: a
+            simulation is only started if it is expected to finish in time, based on the slowest one so far. Only
+            the best plays that the limit leaves time to simulate at least once are re-ranked; if there is no time
+            for any, for instance because generating the candidates took longer than the limit, the play with the
+            highest equity is returned.
+
+        executor: ProcessPoolExecutor
+            If set, the candidates are simulated on the executor's worker processes, one candidate per worker at a
+            time.
+
+        seed: int
+            Seed of the simulation's random racks.
+
+    Returns
+        Candidate
+            The returned candidate's `equity` is its score and leave value, less the average simulated reply.
+    """
+    start = time.time()
+    ranked = rank_moves(snapshot, rack)
+    if not ranked or not time_limit_ms:
+        return ranked[0] if ranked else None
+
+    # simulating a reply generates the opponent's moves, which costs about as much as generating ours did
+    simulation_cost = time.time() - start
+    deadline = start + time_limit_ms / 1000
+    top_candidates = ranked[:candidates_count]
+    unseen = unseen_tiles(snapshot, rack)
+
+    replies = _simulate_candidates(snapshot, top_candidates, unseen, deadline, simulation_cost, executor, seed)
+    if not replies:
+        return ranked[0]
+
+    # candidates that did not get a single simulation are charged the average reply of the others
+    simulated = [total / count for total, count in replies if count]
+    average_reply = sum(simulated) / len(simulated) if simulated else 0.0
+
+    simulated_candidates = []
+    for candidate, (total, count) in zip(top_candidates, replies):
+        reply = total / count if count else average_reply
+        simulated_candidates.append(candidate._replace(equity=candidate.equity - reply))
+
+    return min(simulated_candidates, key=_candidate_rank_key)
+
+
+def _simulate_candidates(snapshot: BoardSnapshot, candidates: list, unseen: list, deadline: float,
+                         simulation_cost: float, executor: Optional[ProcessPoolExecutor], seed: int) -> list:
+    """
+    Simulates the replies to the first candidates with `_simulate_replies`, on the executor's worker processes if
+    set, until `deadline`. The candidates are simulated in rounds of one candidate per worker (a single one without
+    an executor), and each round gets an equal share of the time left, so that candidates queued behind busy workers
+    still get their turn. Only as many rounds as can each fit a simulation taking `simulation_cost` seconds are run.
+
+    Returns
+        List[Tuple(total_reply_score: int, simulations_count: int)], one per simulated candidate, in the order of
+        the candidates
+    """
+    workers_count = executor._max_workers if executor is not None else 1
+    simulation_start = time.time()
+    budget = max(deadline - simulation_start, 0.0)
+    rounds_count = -(-len(candidates) // workers_count)
+    if simulation_cost > 0:
+        rounds_count = min(rounds_count, int(budget // simulation_cost))
+    candidates = candidates[:rounds_count * workers_count]
+    deadlines = [
+        simulation_start + budget * (idx // workers_count + 1) / rounds_count for idx in range(len(candidates))]
+
+    if executor is None:
+        return [
+            _simulate_replies(snapshot, candidate.tiles, unseen, deadlines[idx], simulation_cost, seed + idx)
+            for idx, candidate in enumerate(candidates)]
+
+    futures = [
+        executor.submit(
+            _simulate_replies, snapshot, candidate.tiles, unseen, deadlines[idx], simulation_cost, seed + idx)
+        for idx, candidate in enumerate(candidates)]
+    return [future.result() for future in futures]
+
+
+def _simulate_replies(snapshot: BoardSnapshot, tiles: list, unseen: list, deadline: float, simulation_cost: float,
+                      seed: int) -> tuple:
+    """
+    Plays `tiles` on the board, then repeatedly draws a random opponent rack from `unseen` and finds the
+    opponent's highest reply score, as long as a simulation taking `simulation_cost` seconds, or as long as the
+    slowest one so far, would end by `deadline` (a `time.time()` value).
+
+    Returns
+        Tuple(total_reply_score: int, simulations_count: int)
+    """
+    play = Play(snapshot, tiles)
+    play.evaluate()
+    next_snapshot = play.committed_snapshot()
+    rng = random.Random(seed)
+
+    total = 0
+    count = 0
+    simulation_start = time.time()
+    while unseen and simulation_start + simulation_cost <= deadline:
+        opponent_rack = ''.join(rng.sample(unseen, min(rack_size, len(unseen))))
+        reply = greedy_move(next_snapshot, opponent_rack)
+        total += reply.score if reply else 0
+        count += 1
+
+        simulation_end = time.time()
+        simulation_cost = max(simulation_cost, simulation_end - simulation_start)
+        simulation_start = simulation_end
+
+    return total, count
+
+
+def _candidate_rank_key(candidate: Candidate) -> tuple:
+    """
+    Sort key putting the highest equity first; ties are broken by score, then by position, for reproducibility.
+    """
+    return (-candidate.equity, -candidate.score,
+            [(tile['row'], tile['col'], tile['letter']) for tile in candidate.tiles])
+
+
+def _subtract_letters(rack: str, letters: list) -> str:
+    """
+    Returns the rack without the given letters.
+    """
+    remaining = Counter(rack)
+    remaining.subtract(letters)
+    return ''.join(sorted(remaining.elements()))
+
+
+class _LineMoveGenerator():
+    """Generates the sets of tiles forming a word along a single row or column.
+
+    Words are grown left to right (top to bottom) from every possible start, one square at a time, by stepping a
+    dictionary cursor, and a branch is abandoned as soon as its letters are not the prefix of any word. A placed
+    tile must also form a word with the tiles above and below it (left and right of it, for a column).
+    """
+
+    def __init__(self, snapshot: BoardSnapshot, orientation: str, line: int, anchors_mask: int, rack: str):
+        self.board = snapshot.board
+        self.lines = snapshot.lines
+        self.orientation = orientation
+        self.line = line
+        self.rack = Counter(rack)
+        self.rack_count = len(rack)
+        self.cells = [self._letter_at(pos) for pos in range(15)]
+        self.anchors = [bool(anchors_mask >> self._bit(pos) & 1) for pos in range(15)]
+        self.cross_checks = {}
+        self.moves_found = []
+
+
+    def moves(self) -> list:
+        """
+        Returns the lists of tiles of every word that can be formed on the line.
+        """
+        for start in range(15):
+            if start > 0 and self.cells[start - 1] != '':
+                continue
+            if not self._can_reach_anchor(start):
+                continue
+            self._extend(start, root, [], False)
+
+        return self.moves_found
+
+
+    def _extend(self, pos: int, node: Cursor, placed: list, touches_anchor: bool) -> None:
+        """
+        Extends the word read by `node`, ending just before `pos`, by one square.
+        """
+        if pos == 15 or self.cells[pos] == '':
+            if placed and touches_anchor and node.is_word:
+                self.moves_found.append(list(placed))
+
+            if pos == 15:
+                return
+
+            allowed_letters = self._cross_check(pos)
+            for letter in list(self.rack):
+                if self.rack[letter] == 0:
+                    continue
+                if allowed_letters is not None and letter not in allowed_letters:
+                    continue
+                child = node.step(letter)
+                if not child.has_prefix:
+                    continue
+
+                self.rack[letter] -= 1
+                placed.append(self._tile(letter, pos))
+                self._extend(pos + 1, child, placed, touches_anchor or self.anchors[pos])
+                placed.pop()
+                self.rack[letter] += 1
+
+        else:
+            child = node.step(self.cells[pos])
+            if child.has_prefix:
+                self._extend(pos + 1, child, placed, touches_anchor)
+
+
+    def _can_reach_anchor(self, start: int) -> bool:
+        """
+        Returns True if an anchor can be covered from `start` with the tiles of the rack.
+        """
+        empty_count = 0
+        for pos in range(start, 15):
+            if self.cells[pos] == '':
+                empty_count += 1
+                if empty_count > self.rack_count:
+                    return False
+            if self.anchors[pos]:
+                return True
+        return False
+
+
+    def _cross_check(self, pos: int) -> Optional[frozenset]:
+        """
+        Returns the letters that form a word with the tiles across the line at `pos`, or None if there are no
+        tiles across the line there.
+        """
+        if pos not in self.cross_checks:
+            self.cross_checks[pos] = self._compute_cross_check(pos)
+        return self.cross_checks[pos]
+
+
+    def _compute_cross_check(self, pos: int) -> Optional[frozenset]:
+        # the word segments of the line across this one at `pos` (see `BoardSnapshot.lines`)
+        cross_segments = self.lines[15 + pos] if self.orientation == 'horizontal' else self.lines[pos]
+        before_segment = cross_segments[self.line - 1] if self.line > 0 else None
+        after_segment = cross_segments[self.line + 1] if self.line < 14 else None
+        before = before_segment.word if before_segment else ''
+        after = after_segment.word if after_segment else ''
+
+        if not before and not after:
+            return None
+
+        allowed_letters = set()
+        before_node = cursor(before)
+        for letter in before_node.children:
+            node = before_node.step(letter)
+            for after_letter in after:
+                node = node.step(after_letter)
+                if not node.has_prefix:
+                    break
+            if node.is_word:
+                allowed_letters.add(letter)
+
+        return frozenset(allowed_letters)
+
+
+    def _letter_at(self, pos: int) -> str:
+        if self.orientation == 'horizontal':
+            return self.board[self.line][pos]
+        return self.board[pos][self.line]
+
+
+    def _bit(self, pos: int) -> int:
+        if self.orientation == 'horizontal':
+            return self.line * 15 + pos
+        return pos * 15 + self.line
+
+
+    def _tile(self, letter: str, pos: int) -> dict:
+        if self.orientation == 'horizontal':
+            return {'letter': letter, 'row': self.line, 'col': pos}
+        return {'letter': letter, 'row': pos, 'col': self.line}
+
+
+def benchmark(games_count: int = 10, seed: int = 0, time_limit_ms: Optional[int] = None,
+              workers: int = 0) -> dict:
+    """
+    Plays `games_count` seeded games of `best_move` against `greedy_move`, alternating who plays first, and
+    returns the results and the move generation throughput. Games with the same arguments are identical, except
+    when `time_limit_ms` is set: the number of simulations then depends on the speed of the machine.
+    """
+    from scrabble import ScrabbleGame
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    results = {'games': games_count, 'wins': 0, 'losses': 0, 'ties': 0, 'score': 0, 'greedy_score': 0}
+    turns_count = 0
+    generation_seconds = 0.0
+    candidates_count = 0
+
+    try:
+        for game_idx in range(games_count):
+            rng = random.Random(seed + game_idx)
+            bag = [letter for letter, count in tile_counts.items() for _ in range(count)]
+            rng.shuffle(bag)
+
+            game = ScrabbleGame()
+            players = ['search', 'greedy'] if game_idx % 2 == 0 else ['greedy', 'search']
+            racks = {player: '' for player in players}
+            scores = {player: 0 for player in players}
+            consecutive_passes = 0
+            turn_idx = 0
+
+            while consecutive_passes < 2 * len(players):
+                player = players[turn_idx % len(players)]
+                turn_idx += 1
+                turns_count += 1
+
+                draw_count = min(rack_size - len(racks[player]), len(bag))
+                racks[player] += ''.join(bag[:draw_count])
+                del bag[:draw_count]
+
+                generation_start = time.time()
+                candidates_count += len(legal_moves(game.snapshot, racks[player]))
+                generation_seconds += time.time() - generation_start
+
+                if player == 'search':
+                    move = best_move(game.snapshot, racks[player], time_limit_ms, executor=executor,
+                                     seed=seed + turns_count)
+                else:
+                    move = greedy_move(game.snapshot, racks[player])
+
+                if move is None:
+                    consecutive_passes += 1
+                    continue
+
+                consecutive_passes = 0
+                scores[player] += game.play_tiles(move.tiles)['score']
+                racks[player] = move.leave
+                if not bag and not racks[player]:
+                    break
+
+            results['score'] += scores['search']
+            results['greedy_score'] += scores['greedy']
+            if scores['search'] > scores['greedy']:
+                results['wins'] += 1
+            elif scores['search'] < scores['greedy']:
+                results['losses'] += 1
+            else:
+                results['ties'] += 1
+
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    results['average_score'] = results.pop('score') / games_count
+    results['average_greedy_score'] = results.pop('greedy_score') / games_count
+    results['turns'] = turns_count
+    results['candidates_per_second'] = candidates_count / generation_seconds if generation_seconds else 0.0
+    results['generations_per_second'] = turns_count / generation_seconds if generation_seconds else 0.0
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark best_move against a greedy player.')
+    parser.add_argument('--games', type=int, default=10, help='number of games to play')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the tile bags and simulations')
+    parser.add_argument('--time-limit-ms', type=int, default=None, help='look-ahead time per move')
+    parser.add_argument('--workers', type=int, default=0, help='size of the look-ahead process pool')
+    parser.add_argument('--derive-leaves', action='store_true',
+                        help='print leave values fitted on --games games of greedy self-play instead')
+    args = parser.parse_args()
+
+    if args.derive_leaves:
+        values_by_letter, duplicate_value, unbalanced_value = derive_leave_values(args.games, args.seed)
+        print(f"leave_values_by_letter = {values_by_letter}")
+        print(f"duplicate_leave_value = {duplicate_value}")
+        print(f"unbalanced_leave_value = {unbalanced_value}")
+    else:
+        for key, value in benchmark(args.games, args.seed, args.time_limit_ms, args.workers).items():
+            print(f"{key}: {value}")
@@ -0,0 +1,194 @@
+"""Asynchronous validation of streams of moves.
+
+`ScrabbleGame.play_tiles` is CPU-bound and would block an event loop, so `StreamValidator` runs it on a bounded
+pool of threads while the loop keeps serving other streams:
+
+    async for result in validate_stream('g1', moves):
+        ...
+
+`moves` is any iterable or async iterable of tiles. The moves of a stream are played one after the other, in
+order, while different games are played in parallel. A stream reads at most `queue_size` moves ahead of the
+results consumed, and at most `max_workers` moves, across all streams, run at once: a slow consumer or a busy
+pool stops a stream from reading more moves, which in turn pushes back on the client.
+
+A malformed move does not end its stream: malformed tiles are rejected by the game like any invalid play, and a move
+that is not a list of tiles gets `{'valid': False, 'score': 0, 'error': str}`. Games are kept until `close_game` is
+called, or, with `max_games`, until they are the least recently played of too many games.
+
+`serve` exposes the validator over TCP, one JSON Lines stream per connection: a first line
+`{"game_id": "g1"}`, then a line per move (its list of tiles), each answered with a line holding the result.
+"""
+import asyncio
+import json
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from scrabble import ScrabbleGame
+
+
+_end_of_stream = object()
+
+
+class StreamValidator():
+    """Plays streams of moves on games kept by id, on a bounded pool of threads.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_size: int = 16, max_games: Optional[int] = None):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.max_games = max_games
+        self.games = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='validator')
+
+        # asyncio's semaphores and locks belong to the event loop they are first used on, so each loop gets its own
+        self._workers_slots_by_loop = weakref.WeakKeyDictionary()
+        self._game_locks_by_loop = weakref.WeakKeyDictionary()
+
+
+    def game(self, game_id: str) -> ScrabbleGame:
+        """
+        Returns the game with the id, creating it on first use.
+        """
+        if game_id in self.games:
+            self.games.move_to_end(game_id)
+            return self.games[game_id]
+
+        self.games[game_id] = ScrabbleGame()
+        if self.max_games is not None and len(self.games) > self.max_games:
+            self.close_game(next(iter(self.games)))
+        return self.games[game_id]
+
+
+    def close_game(self, game_id: str) -> Optional[ScrabbleGame]:
+        """
+        Forgets the game with the id and returns it, or None if there is no such game. Streams already playing on it
+        keep playing on the returned game; new streams with the id start a new game.
+        """
+        for game_locks in self._game_locks_by_loop.values():
+            game_locks.pop(game_id, None)
+        return self.games.pop(game_id, None)
+
+
+    async def validate_stream(self, game_id: str, moves):
+        """
+        Plays each move of `moves` on the game `game_id` and yields its result, as returned by
+        `ScrabbleGame.play_tiles`, in the order of the moves.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in self._workers_slots_by_loop:
+            self._workers_slots_by_loop[loop] = asyncio.Semaphore(self.max_workers)
+            self._game_locks_by_loop[loop] = {}
+        workers_slots = self._workers_slots_by_loop[loop]
+        game_locks = self._game_locks_by_loop[loop]
+
+        game = self.game(game_id)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        reader = asyncio.ensure_future(self._read_moves(moves, queue))
+
+        try:
+            while True:
+                tiles = await queue.get()
+                if tiles is _end_of_stream:
+                    break
+
+                # moves of streams of the same game are played one at a time, in the order they were read
+                async with game_locks.setdefault(game_id, asyncio.Lock()), workers_slots:
+                    result = await loop.run_in_executor(self._executor, _play_tiles, game, tiles)
+                yield result
+
+            # raises the exceptions of the moves' source, if any
+            await reader
+
+        finally:
+            # the consumer may stop early: wait for the reader to be cancelled rather than leave it pending
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+
+    async def _read_moves(self, moves, queue: asyncio.Queue) -> None:
+        """
+        Puts the moves into the queue, waiting whenever the queue is full, then marks the end of the stream.
+        """
+        try:
+            if hasattr(moves, '__aiter__'):
+                async for tiles in moves:
+                    await queue.put(tiles)
+            else:
+                for tiles in moves:
+                    await queue.put(tiles)
+        except Exception:
+            # the consumer gets the exception at the end of the stream; a cancelled reader puts nothing, since the
+            # consumer has stopped draining the queue
+            await queue.put(_end_of_stream)
+            raise
+
+        await queue.put(_end_of_stream)
+
+
+    def close(self) -> None:
+        """
+        Waits for the moves being played and shuts the pool of threads down.
+        """
+        self._executor.shutdown()
+
+
+def _play_tiles(game: ScrabbleGame, tiles) -> dict:
+    """
+    Plays the tiles on the game and returns the result, or an invalid result with an `error` if the move is
+    malformed.
+    """
+    if not isinstance(tiles, list) or not all(isinstance(tile, dict) for tile in tiles):
+        return {'valid': False, 'score': 0, 'error': 'a move must be a list of tiles'}
+
+    try:
+        return game.play_tiles(tiles)
+    except (KeyError, TypeError, ValueError) as exc:
+        return {'valid': False, 'score': 0, 'error': f"malformed move: {exc!r}"}
+
+
+_default_validator = None
+
+
+def validate_stream(game_id: str, moves):
+    """
+    Same as `StreamValidator.validate_stream`, on a validator shared by the whole process.
+    """
+    global _default_validator
+    if _default_validator is None:
+        _default_validator = StreamValidator()
+    return _default_validator.validate_stream(game_id, moves)
+
+
+async def serve(validator: StreamValidator, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+    """
+    Starts serving the validator over TCP (see the module's docstring) and returns the server. With `port` 0, the
+    server listens on a free port: see `server.sockets[0].getsockname()`.
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def read_moves():
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # answered with a malformed move's result
+                    yield None
+
+        try:
+            try:
+                game_id = json.loads(await reader.readline())['game_id']
+            except (ValueError, TypeError, KeyError):
+                writer.write(json.dumps({'error': 'the first line must be {"game_id": ...}'}).encode() + b'\n')
+                return
+
+            async for result in validator.validate_stream(game_id, read_moves()):
+                writer.write(json.dumps(result).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_connection, host, port)
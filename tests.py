@@ -1,4 +1,23 @@
-from scrabble import ScrabbleGame
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import analytics
+import dictionary
+import fuzz
+import gaddag
+import prefork
+import search
+import streaming
+from scrabble import Play, ScrabbleGame, WordSegment, line_segments, scores_by_letter
 
 
 def make_tiles(*tile_specs):
@@ -219,3 +238,746 @@ class TestScrabble:
 
         move = self.game.play_tiles(tiles2)
         assert move == {"valid": True, "score": 10}
+
+    def test_does_not_allow_gaps_between_tiles_in_a_line(self):
+        tiles1 = make_tiles(
+            ("n", 7, 7),
+            ("o", 7, 8),
+        )
+
+        move = self.game.play_tiles(tiles1)
+        assert move == {"valid": True, "score": 2}
+
+        tiles2 = make_tiles(
+            ("s", 7, 6),
+            ("w", 7, 10),
+        )
+
+        move = self.game.play_tiles(tiles2)
+        assert move == {"valid": False, "score": 0}
+
+    def test_allows_playing_a_single_tile(self):
+        tiles1 = make_tiles(
+            ("n", 7, 7),
+            ("o", 7, 8),
+        )
+
+        move = self.game.play_tiles(tiles1)
+        assert move == {"valid": True, "score": 2}
+
+        tiles2 = make_tiles(
+            ("t", 7, 9),
+        )
+
+        move = self.game.play_tiles(tiles2)
+        assert move == {"valid": True, "score": 3}
+
+    def test_allows_plays_along_the_edge_of_the_board(self):
+        # down to the last row
+        tiles1 = make_tiles(
+            ("a", 7, 7),
+            ("b", 8, 7),
+            ("s", 9, 7),
+            ("o", 10, 7),
+            ("l", 11, 7),
+            ("u", 12, 7),
+            ("t", 13, 7),
+            ("e", 14, 7),
+        )
+
+        move = self.game.play_tiles(tiles1)
+        assert move == {"valid": True, "score": 10}
+
+        # along the last row, up to the last column
+        tiles2 = make_tiles(
+            ("m", 14, 8),
+            ("i", 14, 9),
+            ("g", 14, 10),
+            ("r", 14, 11),
+            ("a", 14, 12),
+            ("t", 14, 13),
+            ("e", 14, 14),
+        )
+        move = self.game.play_tiles(tiles2)
+        assert move == {"valid": True, "score": 11}
+
+        # above the bottom-right corner
+        tiles3 = make_tiles(
+            ("s", 13, 14),
+        )
+        move = self.game.play_tiles(tiles3)
+        assert move == {"valid": True, "score": 2}
+
+    def test_scores_each_play_on_its_own(self):
+        tiles1 = make_tiles(
+            ("b", 7, 7),
+            ("u", 7, 8),
+            ("t", 7, 9),
+            ("t", 7, 10),
+            ("o", 7, 11),
+            ("n", 7, 12),
+        )
+        move = self.game.play_tiles(tiles1)
+        assert move == {"valid": True, "score": 8}
+
+        tiles2 = make_tiles(
+            ("h", 6, 11),
+            ("m", 8, 11),
+            ("e", 9, 11),
+        )
+        move = self.game.play_tiles(tiles2)
+        assert move == {"valid": True, "score": 9}
+
+        tiles3 = make_tiles(
+            ("z", 9, 12),
+        )
+        move = self.game.play_tiles(tiles3)
+        assert move == {"valid": False, "score": 0}
+
+        tiles4 = make_tiles(
+            ("s", 7, 13),
+        )
+        move = self.game.play_tiles(tiles4)
+        assert move == {"valid": True, "score": 9}
+        assert self.game.game_score == 26
+
+    def test_evaluates_tiles_without_placing_them(self):
+        tiles = make_tiles(
+            ("n", 7, 7),
+            ("o", 7, 8),
+        )
+
+        assert self.game.evaluate_tiles(tiles) == {"valid": True, "score": 2}
+        assert self.game.game_score == 0
+        assert self.game.board[7][7] == ""
+
+        assert self.game.play_tiles(tiles) == {"valid": True, "score": 2}
+        assert self.game.board[7][7] == "n"
+
+    def test_caches_word_segments_of_the_lines_played_on(self):
+        self.game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8)))
+        lines_before = self.game.snapshot.lines
+
+        move = self.game.play_tiles(make_tiles(("s", 7, 6), ("w", 7, 9)))
+        assert move == {"valid": True, "score": 7}
+
+        lines = self.game.snapshot.lines
+        assert lines[7][6:10] == (WordSegment(6, 9, "snow", 7),) * 4
+        assert lines[15 + 6][7] == WordSegment(7, 7, "s", 1)
+        assert lines[15 + 9][7] == WordSegment(7, 7, "w", 4)
+        assert [line_idx for line_idx in range(30) if lines[line_idx] is not lines_before[line_idx]] == [7, 21, 24]
+
+    def test_splices_tiles_into_the_word_segments_of_the_board(self):
+        for rack in ["etaoins", "rdlucmw", "etaoins", "fgypbvk", "etaoins", "hrdlucm"]:
+            move = search.greedy_move(self.game.snapshot, rack)
+            assert self.game.play_tiles(move.tiles)["valid"]
+
+        board = self.game.board
+        expected_lines = [line_segments(board[row]) for row in range(15)]
+        expected_lines += [line_segments([board[row][col] for row in range(15)]) for col in range(15)]
+        assert list(self.game.snapshot.lines) == expected_lines
+
+    def test_rejects_letters_without_a_score(self):
+        assert self.game.play_tiles(make_tiles(("N", 7, 7), ("O", 7, 8))) == {"valid": False, "score": 0}
+        assert self.game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8))) == {"valid": True, "score": 2}
+
+        for letter in ["S", "", "?", "sw"]:
+            assert self.game.evaluate_tiles(make_tiles((letter, 7, 6), ("w", 7, 9))) == {"valid": False, "score": 0}
+
+        play = Play(self.game.snapshot, make_tiles(("S", 7, 6), ("w", 7, 9)))
+        play.evaluate()
+        assert play.rejection_reason == "invalid_letter"
+
+
+class TestScrabbleConcurrency:
+    """Stress tests for sharing a single game between threads."""
+
+    plays = [
+        make_tiles(("b", 7, 7), ("u", 7, 8), ("t", 7, 9), ("t", 7, 10), ("o", 7, 11), ("n", 7, 12)),
+        make_tiles(("h", 6, 11), ("m", 8, 11), ("e", 9, 11)),
+        make_tiles(("s", 7, 13)),
+        make_tiles(("r", 10, 11)),
+        make_tiles(("a", 8, 7)),
+    ]
+    probe = make_tiles(("y", 10, 11))
+
+    def setup_method(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def teardown_method(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_commits_only_one_of_many_concurrent_identical_plays(self):
+        game = ScrabbleGame()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            moves = list(pool.map(lambda _: game.play_tiles(self.plays[0]), range(400)))
+
+        assert moves.count({"valid": True, "score": 8}) == 1
+        assert moves.count({"valid": False, "score": 0}) == 399
+        assert game.game_score == 8
+
+    def test_commits_every_concurrent_play_exactly_once(self):
+        game = ScrabbleGame()
+        game.play_tiles(self.plays[0])
+
+        independent_plays = [self.plays[2], self.plays[4]]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            moves = list(pool.map(lambda i: game.play_tiles(independent_plays[i % 2]), range(400)))
+
+        valid_moves = [move for move in moves if move["valid"]]
+        assert len(valid_moves) == 2
+        assert game.game_score == 8 + sum(move["score"] for move in valid_moves)
+
+    def test_reads_see_consistent_snapshots_while_plays_are_committed(self):
+        reference = ScrabbleGame()
+        expected_probe_by_state = {self._state(reference.snapshot): reference.evaluate_tiles(self.probe)}
+        for tiles in self.plays:
+            assert reference.play_tiles(tiles)["valid"]
+            expected_probe_by_state[self._state(reference.snapshot)] = reference.evaluate_tiles(self.probe)
+
+        for _ in range(20):
+            game = ScrabbleGame()
+            done = threading.Event()
+            errors = []
+
+            def read():
+                while not done.is_set():
+                    snapshot = game.snapshot
+                    state = self._state(snapshot)
+                    if state not in expected_probe_by_state:
+                        errors.append(f"unexpected state: {state}")
+                    elif Play(snapshot, self.probe).evaluate() != expected_probe_by_state[state]:
+                        errors.append(f"unexpected probe result for state: {state}")
+                    game.evaluate_tiles(self.probe)
+                    game.render_board()
+
+            readers = [threading.Thread(target=read) for _ in range(8)]
+            for reader in readers:
+                reader.start()
+            for tiles in self.plays:
+                assert game.play_tiles(tiles)["valid"]
+            done.set()
+            for reader in readers:
+                reader.join()
+
+            assert errors == []
+            assert self._state(game.snapshot) == self._state(reference.snapshot)
+
+    def _state(self, snapshot):
+        return (snapshot.board, snapshot.occupied_mask, snapshot.game_score)
+
+
+class TestAnalytics:
+    """Replaying game archives into a columnar store."""
+
+    def test_aggregates_replayed_moves(self, tmp_path, monkeypatch):
+        games = [
+            {"game_id": "g1", "moves": [
+                make_tiles(("n", 7, 7), ("o", 7, 8)),
+                make_tiles(("s", 7, 6), ("w", 7, 10)),
+                make_tiles(("s", 7, 6), ("w", 7, 9)),
+            ]},
+            {"game_id": "g2", "moves": [
+                make_tiles(("n", 8, 7), ("o", 8, 8)),
+                make_tiles(("n", 7, 7), ("o", 7, 8)),
+                make_tiles(("n", 7, 7)),
+            ]},
+            {"game_id": "g3", "moves": [
+                make_tiles(("n", 7, 7), ("o", 7, 8)),
+            ]},
+        ]
+        archive_path = tmp_path / "games.jsonl"
+        archive_path.write_text("".join(json.dumps(game) + "\n" for game in games))
+
+        moves_count = analytics.build_store([str(archive_path)], str(tmp_path / "store"), workers=2, games_per_chunk=2)
+
+        store = analytics.MoveStore(str(tmp_path / "store"))
+        assert list(store.column("games", "game_id")) == ["g1", "g2", "g3"]
+        assert list(store.column("moves", "game")) == [0, 0, 0, 1, 1, 1, 2]
+        assert list(store.column("moves", "score")) == [2, 0, 7, 0, 2, 0, 2]
+        assert [len(chunk) for chunk in store.chunks("moves", "score")] == [6, 1]
+        assert all(isinstance(chunk, analytics.np.memmap) for chunk in store.chunks("moves", "score"))
+
+        # aggregations go chunk by chunk, without loading whole columns
+        store = analytics.MoveStore(str(tmp_path / "store"))
+        monkeypatch.setattr(analytics.MoveStore, "column", None)
+        assert moves_count == store.moves_count() == 7
+        assert store.average_score_per_move() == 13 / 4
+        assert store.most_common_words(2) == [("no", 3), ("snow", 1)]
+        assert store.rejection_reason_counts() == {
+            "out_of_board": 0,
+            "occupied": 1,
+            "not_at_center": 1,
+            "not_connected": 0,
+            "not_in_line": 0,
+            "gap": 1,
+            "invalid_word": 0,
+            "invalid_letter": 0,
+            "malformed": 0,
+        }
+
+
+class TestDictionary:
+    """Prefix queries on the dictionary."""
+
+    def test_steps_a_cursor_through_a_prefix(self):
+        node = dictionary.root.step("c").step("a")
+
+        assert node.prefix == "ca"
+        assert node.has_prefix
+        assert node.step("t").is_word
+        assert not node.step("q").step("z").has_prefix
+        assert not node.step("q").step("z").is_word
+        assert not dictionary.root.step("q").step("z").step("x").children
+
+    def test_lists_the_letters_that_can_follow_a_prefix(self):
+        node = dictionary.cursor("buttonhol")
+
+        assert node.children == "de"
+        node = dictionary.cursor("ca")
+        assert all(node.step(letter).has_prefix for letter in node.children)
+
+    def test_reuses_cursors_of_recently_seen_prefixes(self):
+        dictionary.cursor.cache_clear()
+        dictionary.cursor("cat")
+        misses = dictionary.cursor.cache_info().misses
+
+        dictionary.cursor("cats")
+        assert dictionary.cursor.cache_info().misses == misses + 1
+
+        dictionary.cursor("cart")
+        assert dictionary.cursor.cache_info().misses == misses + 3
+        assert dictionary.has_prefix("cart")
+        assert not dictionary.has_prefix("cartz")
+
+
+class TestFuzz:
+    """Differential fuzzing against the reference rules."""
+
+    def test_optimized_paths_agree_with_the_reference(self):
+        report = fuzz.fuzz(sequences_count=5, moves_count=15, seed=1)
+
+        assert report.moves_count == 75
+        assert report.discrepancy is None, fuzz.format_reproducer(report.discrepancy)
+
+    def test_shrinks_a_discrepancy_to_a_minimal_reproducer(self):
+        def run_miscounting_the_letter_e(moves):
+            return [
+                dict(result, score=result["score"] + 1)
+                if result["valid"] and any(tile["letter"] == "e" for tile in tiles) else result
+                for tiles, result in zip(moves, fuzz._run_play_tiles(moves))]
+
+        paths = {"miscounting": run_miscounting_the_letter_e}
+        report = fuzz.fuzz(sequences_count=5, moves_count=15, seed=0, paths_to_check=paths)
+        discrepancy = report.discrepancy
+
+        assert discrepancy.path == "miscounting"
+        assert discrepancy.move_idx == len(discrepancy.moves) - 1
+        assert any(tile["letter"] == "e" for tile in discrepancy.moves[-1])
+        for move_idx in range(len(discrepancy.moves)):
+            moves = discrepancy.moves[:move_idx] + discrepancy.moves[move_idx + 1:]
+            assert not moves or fuzz.find_discrepancy(moves, paths) is None
+        assert "game.play_tiles(" in fuzz.format_reproducer(discrepancy)
+
+    def test_shrinks_a_crash_of_a_path_into_a_discrepancy(self):
+        def run_crashing_on_the_letter_q(moves):
+            for tiles, result in zip(moves, fuzz._run_play_tiles(moves)):
+                if any(tile["letter"] == "q" for tile in tiles):
+                    raise KeyError("q")
+                yield result
+
+        paths = {"crashing": run_crashing_on_the_letter_q}
+        report = fuzz.fuzz(sequences_count=20, moves_count=15, seed=0, paths_to_check=paths)
+        discrepancy = report.discrepancy
+
+        assert discrepancy.path == "crashing"
+        assert discrepancy.actual == {"error": "KeyError('q')"}
+        assert discrepancy.moves == [[tile] for tile in discrepancy.moves[-1] if tile["letter"] == "q"]
+
+    def test_agrees_on_rejecting_malformed_tiles(self):
+        moves = [
+            make_tiles(("n", 7, 7), ("o", 7, 8)),
+            make_tiles(("S", 7, 6), ("w", 7, 9)),
+            make_tiles(("", 7, 6)),
+            make_tiles((None, 7, 6)),
+            make_tiles(("s", "7", 6)),
+            [{"letter": "s", "row": 7}],
+            make_tiles(("s", 7, 6), ("w", 7, 9)),
+        ]
+
+        assert [result["valid"] for result in fuzz.run_reference(moves)] == [True] + [False] * 5 + [True]
+        assert fuzz.find_discrepancy(moves) is None
+
+        random_moves = fuzz.random_moves(fuzz.random.Random(0), 200)
+        assert any(set(tile) != {"letter", "row", "col"} or tile["letter"] not in scores_by_letter
+                   for tiles in random_moves for tile in tiles)
+
+
+class TestGaddag:
+    """Bidirectional queries over the GADDAG cache of a words file."""
+
+    words = ["cat", "cats", "scat", "at", "act", "tact", "bat", "bath", "tab"]
+
+    @pytest.fixture
+    def words_path(self, tmp_path):
+        words_path = tmp_path / "words.txt"
+        words_path.write_text("\n".join(self.words) + "\n")
+        return str(words_path)
+
+    def test_extends_fragments_in_both_directions(self, words_path):
+        graph = gaddag.load(words_path)
+
+        for fragment in ["a", "at", "ct", "th", "cats", "x"]:
+            expected = sorted(
+                (word[:idx], word[idx + len(fragment):])
+                for word in self.words for idx in range(len(word)) if word.startswith(fragment, idx))
+            assert sorted(graph.extend(fragment)) == expected
+
+        assert all(graph.is_word(word) for word in self.words)
+        assert not any(graph.is_word(word) for word in ["ca", "ats", "tac", "x", ""])
+        graph.close()
+
+    def test_extends_fragments_with_rack_letters_within_bounds(self, words_path):
+        graph = gaddag.load(words_path)
+
+        assert sorted(graph.extend("a", rack="ct")) == [("", "ct"), ("", "t"), ("c", "t")]
+        assert sorted(graph.extend("at", rack="cs", max_right=0)) == [("", ""), ("c", ""), ("sc", "")]
+        assert sorted(graph.extend("a", rack="bhst", max_left=0)) == [("", "t")]
+        graph.close()
+
+    def test_maps_the_cache_until_the_words_change(self, words_path):
+        gaddag_path = words_path + ".gaddag"
+        graph = gaddag.load(words_path)
+        graph.close()
+        cache_mtime = os.stat(gaddag_path).st_mtime_ns
+
+        graph = gaddag.load(words_path)
+        assert os.stat(gaddag_path).st_mtime_ns == cache_mtime
+        assert isinstance(graph.edges, memoryview)
+        assert graph.is_word("tab")
+        graph.close()
+
+        with open(words_path, "a") as words_file:
+            words_file.write("tabs\n")
+        graph = gaddag.load(words_path)
+        assert graph.is_word("tabs")
+        graph.close()
+
+    def test_rejects_empty_fragments_and_oversized_alphabets(self, words_path, monkeypatch):
+        graph = gaddag.load(words_path)
+        with pytest.raises(ValueError):
+            list(graph.extend(""))
+        graph.close()
+
+        os.remove(words_path + ".gaddag")
+        monkeypatch.setattr(gaddag, "read", lambda gaddag_path, words_digest: None)
+        with pytest.raises(OSError):
+            gaddag.load(words_path)
+
+        # 16 two-byte letters and the delimiter take 33 bytes
+        with pytest.raises(ValueError):
+            gaddag.build(["".join(chr(code) for code in range(0x430, 0x440))])
+
+    def test_merges_states_of_the_dictionary(self):
+        words = dictionary.sorted_words[:2000]
+        edges, _, _ = gaddag.build(words)
+
+        assert len(edges) < sum(len(word) * (len(word) + 1) for word in words) / 4
+
+
+class TestSearch:
+    """Move generation and best-move search."""
+
+    def setup_method(self):
+        self.game = ScrabbleGame()
+
+    def test_generates_only_valid_first_plays_through_the_center(self):
+        candidates = search.legal_moves(self.game.snapshot, "buttona")
+
+        assert len(candidates) > 0
+        for candidate in candidates:
+            assert any(tile["row"] == 7 and tile["col"] == 7 for tile in candidate.tiles)
+            assert self.game.evaluate_tiles(candidate.tiles) == {"valid": True, "score": candidate.score}
+
+        words = set("".join(tile["letter"] for tile in candidate.tiles) for candidate in candidates)
+        assert "button" in words
+
+    def test_generates_plays_hooking_onto_existing_tiles(self):
+        self.game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8)))
+
+        candidates = search.legal_moves(self.game.snapshot, "swxxxxx")
+
+        assert any(
+            sorted((tile["letter"], tile["row"], tile["col"]) for tile in candidate.tiles)
+            == [("s", 7, 6), ("w", 7, 9)] and candidate.score == 7
+            for candidate in candidates)
+
+    def test_prefers_keeping_good_tiles_on_the_rack(self):
+        assert search.leave_value("z") > search.leave_value("") > search.leave_value("q")
+        assert search.leave_value("er") > search.leave_value("ee")
+
+        snapshot = self.game.snapshot
+        greedy = search.greedy_move(snapshot, "quitesa")
+        best = search.best_move(snapshot, "quitesa")
+        assert best.equity == max(candidate.equity for candidate in search.legal_moves(snapshot, "quitesa"))
+        assert best.score <= greedy.score
+
+    def test_derives_leave_values_from_greedy_self_play(self):
+        values_by_letter, duplicate_value, unbalanced_value = search.derive_leave_values(games_count=2)
+
+        assert sorted(values_by_letter) == sorted(search.tile_counts)
+        assert all(isinstance(value, float) for value in values_by_letter.values())
+        assert isinstance(duplicate_value, float) and isinstance(unbalanced_value, float)
+        assert search.derive_leave_values(games_count=2) == (values_by_letter, duplicate_value, unbalanced_value)
+
+    def test_returns_no_move_when_nothing_can_be_played(self):
+        assert search.best_move(self.game.snapshot, "") is None
+        assert search.greedy_move(self.game.snapshot, "") is None
+
+    def test_simulates_replies_over_a_process_pool(self):
+        self.game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8)))
+        snapshot = self.game.snapshot
+
+        candidates = search.rank_moves(snapshot, "setrain")[:5]
+        unseen = search.unseen_tiles(snapshot, "setrain")
+
+        with search.ProcessPoolExecutor(max_workers=2) as executor:
+            move = search.best_move(snapshot, "setrain", time_limit_ms=200, candidates_count=2, executor=executor)
+
+            # 3 rounds of up to 2 candidates: the candidates queued behind busy workers are simulated too
+            replies = search._simulate_candidates(snapshot, candidates, unseen, time.time() + 3.0, 0.0, executor, 0)
+            assert [count > 0 for _, count in replies] == [True] * 5
+
+            # only the rounds that fit a simulation are run
+            replies = search._simulate_candidates(snapshot, candidates, unseen, time.time() + 3.0, 1.4, executor, 0)
+            assert len(replies) == 4
+
+        assert move is not None
+        assert self.game.evaluate_tiles(move.tiles)["valid"]
+
+    def test_counts_the_generation_of_the_candidates_in_the_time_limit(self, monkeypatch):
+        self.game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8)))
+        snapshot = self.game.snapshot
+        simulations = []
+        greedy_move = search.greedy_move
+        monkeypatch.setattr(search, "greedy_move", lambda *args: simulations.append(args) or greedy_move(*args))
+
+        # generating the candidates takes longer than the limit: no simulation is started
+        move = search.best_move(snapshot, "setrain", time_limit_ms=1, candidates_count=2)
+        assert simulations == []
+        assert move == search.rank_moves(snapshot, "setrain")[0]
+
+        start = time.time()
+        search.rank_moves(snapshot, "setrain")
+        generation_ms = (time.time() - start) * 1000
+        time_limit_ms = int(generation_ms * 4) + 50
+
+        start = time.time()
+        search.best_move(snapshot, "setrain", time_limit_ms=time_limit_ms, candidates_count=2)
+        assert len(simulations) > 0
+        assert (time.time() - start) * 1000 < time_limit_ms + generation_ms
+
+
+class TestStreaming:
+    """Streams of moves validated on an event loop."""
+
+    plays = TestScrabbleConcurrency.plays
+
+    def setup_method(self):
+        reference = ScrabbleGame()
+        self.expected = [reference.play_tiles(tiles) for tiles in self.plays]
+
+    def test_validates_streams_of_games_in_parallel_over_a_loopback_socket(self):
+        async def run_client(port, game_id, moves):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(json.dumps({"game_id": game_id}).encode() + b"\n")
+            for tiles in moves:
+                writer.write(json.dumps(tiles).encode() + b"\n")
+            await writer.drain()
+            writer.write_eof()
+            results = [json.loads(line) async for line in reader]
+            writer.close()
+            return results
+
+        async def run():
+            validator = streaming.StreamValidator(max_workers=2, queue_size=2)
+            server = await streaming.serve(validator)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                results = await asyncio.gather(
+                    run_client(port, "g1", self.plays),
+                    run_client(port, "g2", self.plays),
+                    run_client(port, "g3", self.plays[:1] * 2),
+                )
+            validator.close()
+            return validator, results
+
+        validator, results = asyncio.run(run())
+
+        assert results == [self.expected, self.expected, [self.expected[0], {"valid": False, "score": 0}]]
+        assert validator.games["g1"].game_score == sum(move["score"] for move in self.expected)
+
+    def test_reads_a_bounded_number_of_moves_ahead_of_a_slow_consumer(self):
+        read_count = 0
+
+        async def moves():
+            nonlocal read_count
+            for tiles in self.plays * 4:
+                read_count += 1
+                yield tiles
+
+        async def run():
+            validator = streaming.StreamValidator(max_workers=1, queue_size=2)
+            reads_ahead = []
+            results_count = 0
+            async for _ in validator.validate_stream("g1", moves()):
+                results_count += 1
+                await asyncio.sleep(0.01)
+                reads_ahead.append(read_count - results_count)
+            validator.close()
+            return results_count, reads_ahead
+
+        results_count, reads_ahead = asyncio.run(run())
+
+        assert results_count == 20
+        assert max(reads_ahead) <= 3
+
+    def test_raises_the_errors_of_the_moves_source(self):
+        async def moves():
+            yield self.plays[0]
+            raise ValueError("bad move")
+
+        async def run():
+            validator = streaming.StreamValidator()
+            results = []
+            try:
+                async for result in validator.validate_stream("g1", moves()):
+                    results.append(result)
+            finally:
+                validator.close()
+            return results
+
+        with pytest.raises(ValueError, match="bad move"):
+            asyncio.run(run())
+
+    def test_stops_reading_moves_when_the_consumer_stops_early(self):
+        async def run():
+            validator = streaming.StreamValidator(queue_size=1)
+            stream = validator.validate_stream("g1", iter(self.plays * 10))
+            assert await stream.__anext__() == self.expected[0]
+            await stream.aclose()
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+            validator.close()
+            return pending
+
+        assert asyncio.run(run()) == set()
+
+    def test_validates_streams_on_successive_event_loops(self):
+        validator = streaming.StreamValidator(max_workers=1)
+
+        async def run(game_ids):
+            streams = [validator.validate_stream(game_id, self.plays) for game_id in game_ids]
+            return await asyncio.gather(*[self._collect(stream) for stream in streams])
+
+        # streams of the same game and of different games wait on each other on both loops
+        assert asyncio.run(run(["g1", "g1", "g2"]))[2] == self.expected
+        assert asyncio.run(run(["g1", "g1", "g3"]))[2] == self.expected
+        validator.close()
+
+    def test_answers_malformed_moves_and_evicts_games(self):
+        malformed_moves = [[{"letter": "b", "col": 7}], "bad", [{"letter": "b", "row": "7", "col": 7}]]
+        validator = streaming.StreamValidator(max_games=2)
+
+        results = asyncio.run(self._collect(validator.validate_stream("g1", malformed_moves + self.plays[:1])))
+        assert results[:3] == [{"valid": False, "score": 0}, results[1], {"valid": False, "score": 0}]
+        assert results[1]["valid"] is False and "error" in results[1]
+        assert results[3]["valid"]
+
+        for game_id in ["g2", "g3"]:
+            asyncio.run(self._collect(validator.validate_stream(game_id, self.plays[:1])))
+        assert list(validator.games) == ["g2", "g3"]
+
+        assert validator.close_game("g2").game_score == self.expected[0]["score"]
+        assert validator.close_game("g2") is None
+        assert list(validator.games) == ["g3"]
+        validator.close()
+
+    async def _collect(self, stream):
+        return [result async for result in stream]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="requires Linux")
+class TestPrefork:
+    """Workers forked from a warmed-up parent process."""
+
+    def test_workers_play_games_sharing_the_parents_dictionary(self):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        stop = context.Event()
+
+        def run_game(worker_idx):
+            game = ScrabbleGame()
+            results.put((worker_idx, game.play_tiles(make_tiles(("n", 7, 7), ("o", 7, 8)))))
+            stop.wait()
+
+        with prefork.WorkerPool(run_game, workers_count=2) as pool:
+            assert sorted(results.get(timeout=10) for _ in range(2)) == [
+                (0, {"valid": True, "score": 2}),
+                (1, {"valid": True, "score": 2}),
+            ]
+
+            unique_memory = pool.unique_memory()
+            stop.set()
+
+        with open("/proc/self/status") as status:
+            parent_rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+
+        assert len(unique_memory) == 2
+        assert all(0 < memory < parent_rss_kb * 1024 / 4 for memory in unique_memory.values())
+
+    def test_non_daemonic_workers_can_use_a_process_pool(self):
+        results = multiprocessing.get_context("fork").Queue()
+
+        def run_with_process_pool(worker_idx):
+            with search.ProcessPoolExecutor(max_workers=1) as executor:
+                results.put(executor.submit(pow, 2, worker_idx).result())
+
+        with prefork.WorkerPool(run_with_process_pool, workers_count=2, daemon=False) as pool:
+            assert sorted(results.get(timeout=10) for _ in range(2)) == [1, 2]
+
+        assert [worker.exitcode for worker in pool.workers] == [0, 0]
+
+    def test_workers_collect_garbage_and_the_parent_restores_its_collector(self):
+        results = multiprocessing.get_context("fork").Queue()
+
+        def report_gc(worker_idx):
+            results.put(gc.isenabled())
+
+        pool = prefork.WorkerPool(report_gc, workers_count=2)
+        assert not gc.isenabled()
+        with pool:
+            assert [results.get(timeout=10) for _ in range(2)] == [True, True]
+        assert gc.isenabled()
+
+    def test_stops_serving_workers_on_exit(self):
+        def serve(worker_idx):
+            while not pool.stop_event.wait(0.01):
+                pass
+
+        def serve_forever(worker_idx):
+            while True:
+                time.sleep(0.01)
+
+        pool = prefork.WorkerPool(serve, workers_count=2)
+        with pool:
+            pass
+        assert [worker.exitcode for worker in pool.workers] == [0, 0]
+
+        start = time.time()
+        with prefork.WorkerPool(serve_forever, workers_count=2, join_timeout=0.2) as forever_pool:
+            pass
+        assert time.time() - start < 5
+        assert all(not worker.is_alive() for worker in forever_pool.workers)